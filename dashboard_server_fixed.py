@@ -1,19 +1,25 @@
-from fastapi import FastAPI, HTTPException, Query, Depends, Header, status
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Depends, Header, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, List, Dict, Any, Union, Annotated
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import uvicorn
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 import json
-from scipy import stats
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+import orjson
+from sqlalchemy import select, func, create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, relationship
 from dotenv import load_dotenv
 import os
+import time
+import hashlib
+import asyncio
+from functools import lru_cache
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -21,7 +27,13 @@ warnings.filterwarnings('ignore')
 load_dotenv()
 
 # Import ML predictions module
-from ml_predictions import predict_health_outcomes, calculate_population_risk_scores, health_predictor
+from ml_predictions import predict_health_outcomes, calculate_population_risk_scores, health_predictor, prepare_longitudinal
+
+# CSV-to-table preparation shared with migrate.py
+from db_prep import (
+    prepare_households_for_db, prepare_adults_for_db, prepare_children_for_db, prepare_programs_for_db,
+    drop_existing_rows, append_rows
+)
 
 # =============================================================================
 # DATABASE SETUP AND MODELS
@@ -123,6 +135,22 @@ def safe_float_list(values, default=0.0):
     """Safely convert a list of values to floats, replacing NaN/inf with default"""
     return [safe_float(v, default) for v in values]
 
+def orjson_default(value):
+    """Serialize pandas/numpy values that orjson does not handle natively"""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+@lru_cache(maxsize=1)
+def _iso_timestamp_for_tick(tick):
+    return datetime.now().isoformat()
+
+def current_iso_timestamp():
+    """Current local time as an ISO string, re-formatted at most once per 100 ms"""
+    return _iso_timestamp_for_tick(int(time.monotonic() * 10))
+
 # =============================================================================
 # AUTHENTICATION SETUP
 # =============================================================================
@@ -191,8 +219,7 @@ class AdultResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ChildCreate(BaseModel):
     child_id: str
@@ -232,8 +259,7 @@ class ChildResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class HouseholdCreate(BaseModel):
     household_id: str
@@ -258,8 +284,7 @@ class HouseholdResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ProgramCreate(BaseModel):
     program: str
@@ -288,8 +313,17 @@ class ProgramResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson (numpy and pandas values serialized natively)"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+def json_fragment(value: Any) -> orjson.Fragment:
+    """Serialize a value once into an immutable fragment that OrjsonResponse embeds as-is"""
+    return orjson.Fragment(orjson.dumps(value, default=orjson_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -297,7 +331,8 @@ app = FastAPI(
     description="API untuk pemantauan program kesehatan dengan fungsionalitas CRUD lengkap dan autentikasi aman",
     version="3.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=OrjsonResponse
 )
 
 # Add CORS middleware for frontend integration
@@ -310,6 +345,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/NDJSON bodies (exports in particular) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
 # =============================================================================
 # CRUD OPERATIONS - ADULTS
 # =============================================================================
@@ -750,102 +788,26 @@ async def migrate_csv_to_database(
         
         # Migrate households first
         if 'households' in data_cache:
-            households_df = data_cache['households']
-            for _, row in households_df.iterrows():
-                try:
-                    existing = db.query(HouseholdRecord).filter(
-                        HouseholdRecord.household_id == row['household_id']
-                    ).first()
-                    
-                    if not existing:
-                        household = HouseholdRecord(
-                            household_id=row['household_id'],
-                            pendapatan_rt=float(row.get('pendapatan_rt', 0)),
-                            kepemilikan_rumah=bool(row.get('kepemilikan_rumah', True)),
-                            akses_listrik=bool(row.get('akses_listrik', True)),
-                            akses_internet=bool(row.get('akses_internet', False))
-                        )
-                        db.add(household)
-                        migration_summary["households"] += 1
-                except Exception as e:
-                    migration_summary["errors"].append(f"Household {row.get('household_id', 'unknown')}: {str(e)}")
+            households_df = prepare_households_for_db(data_cache['households'])
+            households_df = drop_existing_rows(db, HouseholdRecord, households_df, ['household_id'])
+            migration_summary["households"] = append_rows(db, HouseholdRecord, households_df)
         
         # Migrate adults
         if 'adults' in data_cache:
-            adults_df = data_cache['adults']
-            for _, row in adults_df.iterrows():
-                try:
-                    existing = db.query(AdultRecord).filter(
-                        AdultRecord.person_id == row['person_id'],
-                        AdultRecord.date == row['date']
-                    ).first()
-                    
-                    if not existing:
-                        adult = AdultRecord(
-                            person_id=row['person_id'],
-                            household_id=row['household_id'],
-                            date=row['date'],
-                            month=int(row.get('month', 0)),
-                            age=int(row.get('age', row.get('usia', 0))),
-                            sistol=float(row.get('sistol', 0)),
-                            diastol=float(row.get('diastol', 0)),
-                            on_treatment=bool(row.get('on_treatment', False)),
-                            diabetes_koin=bool(row.get('diabetes_koin', False)),
-                            perokok=bool(row.get('perokok', False)),
-                            adherence_current=float(row.get('adherence_current', 1.0))
-                        )
-                        db.add(adult)
-                        migration_summary["adults"] += 1
-                except Exception as e:
-                    migration_summary["errors"].append(f"Adult {row.get('person_id', 'unknown')}: {str(e)}")
+            adults_df = prepare_adults_for_db(data_cache['adults'])
+            adults_df = drop_existing_rows(db, AdultRecord, adults_df, ['person_id', 'date'])
+            migration_summary["adults"] = append_rows(db, AdultRecord, adults_df)
         
         # Migrate children
         if 'children' in data_cache:
-            children_df = data_cache['children']
-            for _, row in children_df.iterrows():
-                try:
-                    existing = db.query(ChildRecord).filter(
-                        ChildRecord.child_id == row['child_id'],
-                        ChildRecord.date == row['date']
-                    ).first()
-                    
-                    if not existing:
-                        child = ChildRecord(
-                            child_id=row['child_id'],
-                            household_id=row['household_id'],
-                            date=row['date'],
-                            month=int(row.get('month', 0)),
-                            usia_bulan=int(row.get('usia_bulan', 0)),
-                            HAZ=float(row.get('HAZ', 0)),
-                            on_program=bool(row.get('on_program', False)),
-                            anemia_hb_gdl=float(row.get('anemia_hb_gdl', 12)) if pd.notna(row.get('anemia_hb_gdl')) else None,
-                            air_bersih=bool(row.get('air_bersih', True)),
-                            jamban_sehat=bool(row.get('jamban_sehat', True)),
-                            haz_change_this_month=float(row.get('haz_change_this_month', 0))
-                        )
-                        db.add(child)
-                        migration_summary["children"] += 1
-                except Exception as e:
-                    migration_summary["errors"].append(f"Child {row.get('child_id', 'unknown')}: {str(e)}")
+            children_df = prepare_children_for_db(data_cache['children'])
+            children_df = drop_existing_rows(db, ChildRecord, children_df, ['child_id', 'date'])
+            migration_summary["children"] = append_rows(db, ChildRecord, children_df)
         
         # Migrate programs
         if 'program_log' in data_cache:
-            programs_df = data_cache['program_log']
-            for _, row in programs_df.iterrows():
-                try:
-                    program = ProgramRecord(
-                        program=row['program'],
-                        target_id=row['target_id'],
-                        household_id=row.get('household_id', ''),
-                        tanggal=row['tanggal'],
-                        biaya_riil=float(row.get('biaya_riil', 0)),
-                        status="active",
-                        description=row.get('description', '')
-                    )
-                    db.add(program)
-                    migration_summary["programs"] += 1
-                except Exception as e:
-                    migration_summary["errors"].append(f"Program {row.get('program', 'unknown')}: {str(e)}")
+            programs_df = prepare_programs_for_db(data_cache['program_log'])
+            migration_summary["programs"] = append_rows(db, ProgramRecord, programs_df)
         
         db.commit()
         
@@ -861,6 +823,83 @@ async def migrate_csv_to_database(
 # Global data storage
 data_cache = {}
 
+# Shared fallback for missing datasets; treat as read-only
+_EMPTY_DF = pd.DataFrame()
+
+# Pre-serialized JSON bodies derived from data_cache; cleared whenever data is reloaded
+response_cache = {}
+
+# Identifies the currently loaded data; regenerated by load_data() and used to build ETags
+data_etag = ""
+
+def etag_matches(if_none_match, etag):
+    """Weak If-None-Match comparison (RFC 9110 13.1.2): any listed tag, with or without W/, or *"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def cached_json_response(request: Request, name: str, build_payload):
+    """Serve a data-derived JSON body with an ETag, answering a matching If-None-Match with 304"""
+    etag = f'"{data_etag}-{name}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    if name not in response_cache:
+        response_cache[name] = orjson.dumps(build_payload())
+    return Response(content=response_cache[name], media_type="application/json", headers={"ETag": etag})
+
+# Per-dataset (id-sorted frame, sorted id array) lookups derived from data_cache; cleared whenever data is reloaded
+row_index_cache = {}
+
+def get_person_rows(dataset, id_column, person_id):
+    """Return one person's rows of a cached longitudinal dataset, prepared for ml_predictions (sorted by id and date)"""
+    df = data_cache.get(dataset, _EMPTY_DF)
+    if df.empty:
+        return df
+    if dataset not in row_index_cache:
+        # Sorted and date-normalized once per load; lookups are a binary search on the id column
+        sorted_df = prepare_longitudinal(df, id_column)
+        row_index_cache[dataset] = (sorted_df, sorted_df[id_column].to_numpy())
+    sorted_df, sorted_ids = row_index_cache[dataset]
+    start, stop = np.searchsorted(sorted_ids, person_id, side='left'), np.searchsorted(sorted_ids, person_id, side='right')
+    return sorted_df.iloc[start:stop]
+
+# Per-dataset latest-record-per-person frames derived from data_cache; cleared whenever data is reloaded
+latest_records_cache = {}
+
+def get_latest_records(dataset, id_column):
+    """Return the most recent record per person (ordered by id) for a cached longitudinal dataset"""
+    if dataset not in latest_records_cache:
+        df = data_cache.get(dataset, _EMPTY_DF)
+        latest_records_cache[dataset] = (
+            df.sort_values([id_column, 'date'], kind='stable')
+            .drop_duplicates(id_column, keep='last')
+            .reset_index(drop=True)
+        )
+    return latest_records_cache[dataset]
+
+def column_to_pylist(series):
+    """Convert a column to a list of native Python values with NaN replaced by None"""
+    if not series.hasnans:
+        # Nothing to replace: skip the object cast and per-cell null mask
+        return series.tolist()
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind == 'f':
+        # Plain float column: box once via NumPy and blank the NaN slots in place
+        values = series.to_numpy()
+        boxed = values.astype(object)
+        boxed[np.isnan(values)] = None
+        return boxed.tolist()
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def frame_to_records(df):
+    """Convert a DataFrame into a list of row dicts by converting column-wise and zipping the columns"""
+    keys = list(df.columns)
+    columns = [column_to_pylist(df[key]) for key in keys]
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
 def safe_correlation(x, y):
     """Safely calculate correlation, returning 0.0 if NaN or insufficient data"""
     try:
@@ -885,7 +924,7 @@ def safe_float(value, default=0.0):
 
 def load_data():
     """Load all longitudinal datasets into memory"""
-    global data_cache
+    global data_cache, data_etag
     try:
         data_cache['adults'] = pd.read_csv('adults_htn_longitudinal.csv')
         data_cache['children'] = pd.read_csv('children_stunting_longitudinal.csv')
@@ -898,6 +937,12 @@ def load_data():
         data_cache['children']['date'] = pd.to_datetime(data_cache['children']['date'])
         data_cache['program_log']['tanggal'] = pd.to_datetime(data_cache['program_log']['tanggal'])
         
+        response_cache.clear()
+        data_etag = hashlib.blake2b(str(time.time_ns()).encode(), digest_size=8).hexdigest()
+        row_index_cache.clear()
+        latest_records_cache.clear()
+        health_predictor.clear_prepared_cache()
+        
         print("✅ Semua dataset berhasil dimuat")
         return True
     except Exception as e:
@@ -908,6 +953,19 @@ def load_data():
 # RISK FACTOR ANALYSIS FUNCTIONS
 # =============================================================================
 
+def count_hypertensive_population(adults_df):
+    """Count unique persons and persons with any hypertensive reading (systolic ≥140 OR diastolic ≥90) in one pass"""
+    person_codes, unique_persons = pd.factorize(adults_df['person_id'])
+    systolic = adults_df['sistol'].to_numpy(dtype=np.float64, na_value=np.nan)
+    diastolic = adults_df['diastol'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # Per-person OR over rows: scatter True into a dense per-person flag array
+    hypertensive_rows = ((systolic >= 140) | (diastolic >= 90)) & (person_codes >= 0)
+    ever_hypertensive = np.zeros(len(unique_persons), dtype=bool)
+    ever_hypertensive[person_codes[hypertensive_rows]] = True
+
+    return len(unique_persons), int(ever_hypertensive.sum())
+
 def analyze_hypertension_risk_factors(adults_df, households_df):
     """Comprehensive analysis of risk factors affecting hypertension (BP)"""
     
@@ -1369,6 +1427,18 @@ def generate_population_risk_summary(risk_factors, health_outcome):
         }
     }
 
+# Keywords marking conceptually similar socioeconomic/infrastructure factors across outcomes
+SHARED_FACTOR_KEYWORDS = ('income', 'economic', 'house', 'electric', 'internet', 'infrastructure')
+
+def factor_keyword_mask(factor_name):
+    """Bitmask of SHARED_FACTOR_KEYWORDS found in a risk factor name"""
+    name = factor_name.lower()
+    mask = 0
+    for bit, keyword in enumerate(SHARED_FACTOR_KEYWORDS):
+        if keyword in name:
+            mask |= 1 << bit
+    return mask
+
 def safe_serialize_dict(data_dict):
     """Safely serialize dictionary containing pandas/numpy objects to JSON-compatible types"""
     if data_dict is None:
@@ -1583,23 +1653,25 @@ async def get_overall_dashboard(
             period_months = 1
 
         # Determine default end_date/start_date from the actual data (works for DB and CSV modes)
-        if not end_date:
+        # Parse each bound once; strings are only formatted for the response
+        if end_date:
+            end_dt = pd.Timestamp(end_date)
+        else:
             latest_adult_date = adults_df['date'].max() if not adults_df.empty else pd.Timestamp('2023-12-31')
             latest_children_date = children_df['date'].max() if not children_df.empty else pd.Timestamp('2023-12-31')
             latest_program_date = program_log['tanggal'].max() if not program_log.empty else pd.Timestamp('2023-12-31')
             data_end_date = max(latest_adult_date, latest_children_date, latest_program_date)
-            end_date = pd.to_datetime(data_end_date).strftime('%Y-%m-%d')
+            end_dt = pd.Timestamp(data_end_date).normalize()
+            end_date = end_dt.strftime('%Y-%m-%d')
 
-        if not start_date:
-            end_dt = pd.to_datetime(end_date)
+        if start_date:
+            start_dt = pd.Timestamp(start_date)
+        else:
             # Approximate months by 30 days each (sufficient for dashboard windows)
             start_dt = end_dt - timedelta(days=period_months * 30)
             start_date = start_dt.strftime('%Y-%m-%d')
-        
+
         # Apply date filters
-        start_dt = pd.to_datetime(start_date)
-        end_dt = pd.to_datetime(end_date)
-        
         adults_df = adults_df[(adults_df['date'] >= start_dt) & (adults_df['date'] <= end_dt)]
         children_df = children_df[(children_df['date'] >= start_dt) & (children_df['date'] <= end_dt)]
         program_log = program_log[(program_log['tanggal'] >= start_dt) & (program_log['tanggal'] <= end_dt)]
@@ -1939,25 +2011,26 @@ async def get_dusun_dashboard(
         period_months = int(time_period) if time_period in ["1", "3", "12"] else 1
         
         # Calculate date range based on actual data dates, not current date
-        if not end_date:
+        if end_date:
+            end_dt = pd.Timestamp(end_date)
+        else:
             # Use the latest date from the actual data
             latest_adult_date = adults_df['date'].max() if not adults_df.empty else pd.Timestamp('2023-12-31')
             latest_children_date = children_df['date'].max() if not children_df.empty else pd.Timestamp('2023-12-31')
             latest_program_date = program_log['tanggal'].max() if not program_log.empty else pd.Timestamp('2023-12-31')
-            
+
             # Use the latest date across all datasets
             data_end_date = max(latest_adult_date, latest_children_date, latest_program_date)
-            end_date = data_end_date.strftime('%Y-%m-%d')
-            
-        if not start_date:
-            end_dt = pd.to_datetime(end_date)
+            end_dt = data_end_date.normalize()
+            end_date = end_dt.strftime('%Y-%m-%d')
+
+        if start_date:
+            start_dt = pd.Timestamp(start_date)
+        else:
             start_dt = end_dt - timedelta(days=period_months * 30)
             start_date = start_dt.strftime('%Y-%m-%d')
-        
+
         # Apply date filters
-        start_dt = pd.to_datetime(start_date)
-        end_dt = pd.to_datetime(end_date)
-        
         adults_df = adults_df[(adults_df['date'] >= start_dt) & (adults_df['date'] <= end_dt)]
         children_df = children_df[(children_df['date'] >= start_dt) & (children_df['date'] <= end_dt)]
         program_log = program_log[(program_log['tanggal'] >= start_dt) & (program_log['tanggal'] <= end_dt)]
@@ -2173,25 +2246,26 @@ async def get_household_dashboard(
         period_months = int(time_period) if time_period in ["1", "3", "12"] else 1
         
         # Calculate date range based on actual data dates, not current date
-        if not end_date:
+        if end_date:
+            end_dt = pd.Timestamp(end_date)
+        else:
             # Use the latest date from the actual data
             latest_adult_date = adults_df['date'].max() if not adults_df.empty else pd.Timestamp('2023-12-31')
             latest_children_date = children_df['date'].max() if not children_df.empty else pd.Timestamp('2023-12-31')
             latest_program_date = program_log['tanggal'].max() if not program_log.empty else pd.Timestamp('2023-12-31')
-            
+
             # Use the latest date across all datasets
             data_end_date = max(latest_adult_date, latest_children_date, latest_program_date)
-            end_date = data_end_date.strftime('%Y-%m-%d')
-            
-        if not start_date:
-            end_dt = pd.to_datetime(end_date)
+            end_dt = data_end_date.normalize()
+            end_date = end_dt.strftime('%Y-%m-%d')
+
+        if start_date:
+            start_dt = pd.Timestamp(start_date)
+        else:
             start_dt = end_dt - timedelta(days=period_months * 30)
             start_date = start_dt.strftime('%Y-%m-%d')
-        
+
         # Apply date filters
-        start_dt = pd.to_datetime(start_date)
-        end_dt = pd.to_datetime(end_date)
-        
         adults_df = adults_df[(adults_df['date'] >= start_dt) & (adults_df['date'] <= end_dt)]
         children_df = children_df[(children_df['date'] >= start_dt) & (children_df['date'] <= end_dt)]
         program_log = program_log[(program_log['tanggal'] >= start_dt) & (program_log['tanggal'] <= end_dt)]
@@ -2438,11 +2512,12 @@ async def get_analytics_summary():
         
         # Health outcomes
         bp_changes = adults_df.groupby('person_id')['sistol'].agg(['first', 'last'])
-        bp_changes['improvement'] = bp_changes['first'] - bp_changes['last']
-        avg_bp_improvement = bp_changes['improvement'].mean()
-        
-        haz_improvement = children_df['haz_change_this_month'].mean()
-        
+        bp_improvements = (bp_changes['first'] - bp_changes['last']).to_numpy()
+        avg_bp_improvement = safe_float(np.nanmean(bp_improvements)) if bp_improvements.size else 0.0
+
+        haz_changes = children_df['haz_change_this_month'].to_numpy(dtype=np.float64, na_value=np.nan)
+        haz_improvement = safe_float(np.nanmean(haz_changes)) if haz_changes.size else 0.0
+
         return {
             "population_overview": {
                 "total_adults": int(total_adults),
@@ -2458,8 +2533,8 @@ async def get_analytics_summary():
                 "cost_effectiveness_ratio": float(total_program_cost / (adults_in_treatment + children_in_program)) if (adults_in_treatment + children_in_program) > 0 else 0
             },
             "health_outcomes": {
-                "avg_bp_improvement": float(avg_bp_improvement) if not pd.isna(avg_bp_improvement) else 0,
-                "avg_haz_improvement": float(haz_improvement) if not pd.isna(haz_improvement) else 0,
+                "avg_bp_improvement": avg_bp_improvement,
+                "avg_haz_improvement": haz_improvement,
                 "treatment_success_rate": float((adults_in_treatment / total_adults) * 100) if total_adults > 0 else 0
             }
         }
@@ -2467,6 +2542,13 @@ async def get_analytics_summary():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Kesalahan dalam menghasilkan ringkasan analitik: {str(e)}")
 
+def monthly_trend_lists(series):
+    """Convert a period-indexed aggregate into JSON-ready date/value lists"""
+    return {
+        "dates": series.index.astype(str).tolist(),
+        "values": series.to_numpy(dtype=np.float64).tolist()
+    }
+
 @app.get("/analytics/trends")
 async def get_detailed_trends():
     """Get detailed trend analysis"""
@@ -2487,36 +2569,21 @@ async def get_detailed_trends():
         monthly_child_participation = children_df.groupby(children_df['date'].dt.to_period('M'))['on_program'].mean()
         
         trends["monthly_participation"] = {
-            "adults": {
-                "dates": [str(d) for d in monthly_adult_participation.index],
-                "values": [float(v) for v in monthly_adult_participation.values]
-            },
-            "children": {
-                "dates": [str(d) for d in monthly_child_participation.index],
-                "values": [float(v) for v in monthly_child_participation.values]
-            }
+            "adults": monthly_trend_lists(monthly_adult_participation),
+            "children": monthly_trend_lists(monthly_child_participation)
         }
         
         # Monthly costs
         monthly_costs = program_log.groupby(program_log['tanggal'].dt.to_period('M'))['biaya_riil'].sum()
-        trends["monthly_costs"] = {
-            "dates": [str(d) for d in monthly_costs.index],
-            "values": [float(v) for v in monthly_costs.values]
-        }
+        trends["monthly_costs"] = monthly_trend_lists(monthly_costs)
         
         # Health outcomes trends
         monthly_bp = adults_df.groupby(adults_df['date'].dt.to_period('M'))['sistol'].mean()
         monthly_haz = children_df.groupby(children_df['date'].dt.to_period('M'))['HAZ'].mean()
         
         trends["health_outcomes"] = {
-            "blood_pressure": {
-                "dates": [str(d) for d in monthly_bp.index],
-                "values": [float(v) for v in monthly_bp.values]
-            },
-            "haz_scores": {
-                "dates": [str(d) for d in monthly_haz.index],
-                "values": [float(v) for v in monthly_haz.values]
-            }
+            "blood_pressure": monthly_trend_lists(monthly_bp),
+            "haz_scores": monthly_trend_lists(monthly_haz)
         }
         
         return trends
@@ -2547,22 +2614,23 @@ async def get_hypertension_risk_factors(
         period_months = int(time_period) if time_period in ["1", "3", "12"] else 1
         print(f"Period months: {period_months}")
         
-        if not end_date:
-            data_end_date = adults_df['date'].max()
-            end_date = data_end_date.strftime('%Y-%m-%d')
+        if end_date:
+            end_dt = pd.Timestamp(end_date)
+        else:
+            end_dt = adults_df['date'].max().normalize()
+            end_date = end_dt.strftime('%Y-%m-%d')
             print(f"Auto-set end_date: {end_date}")
-            
-        if not start_date:
-            end_dt = pd.to_datetime(end_date)
+
+        if start_date:
+            start_dt = pd.Timestamp(start_date)
+        else:
             start_dt = end_dt - timedelta(days=period_months * 30)
             start_date = start_dt.strftime('%Y-%m-%d')
             print(f"Auto-set start_date: {start_date}")
-        
+
         # Apply date filters
         print("Applying date filters...")
-        start_dt = pd.to_datetime(start_date)
-        end_dt = pd.to_datetime(end_date)
-        
+
         print("Filtering adults data...")
         adults_df_filtered = adults_df[(adults_df['date'] >= start_dt) & (adults_df['date'] <= end_dt)]
         print(f"Filtered adults data: {adults_df_filtered.shape}")
@@ -2577,13 +2645,8 @@ async def get_hypertension_risk_factors(
         
         # Calculate additional population metrics
         print("Calculating population metrics...")
-        total_population = adults_df_filtered['person_id'].nunique()
+        total_population, hypertensive_population = count_hypertensive_population(adults_df_filtered)
         print(f"Total population: {total_population}")
-        
-        # Use safe boolean operations for hypertension definition
-        systolic_condition = adults_df_filtered['sistol'].fillna(0) >= 140
-        diastolic_condition = adults_df_filtered['diastol'].fillna(0) >= 90
-        hypertensive_population = adults_df_filtered[systolic_condition | diastolic_condition]['person_id'].nunique()
         print(f"Hypertensive population: {hypertensive_population}")
         
         prevalence_rate = (hypertensive_population / total_population * 100) if total_population > 0 else 0
@@ -2645,18 +2708,19 @@ async def get_stunting_risk_factors(
         # Parse time period and apply filters
         period_months = int(time_period) if time_period in ["1", "3", "12"] else 1
         
-        if not end_date:
-            data_end_date = children_df['date'].max()
-            end_date = data_end_date.strftime('%Y-%m-%d')
-            
-        if not start_date:
-            end_dt = pd.to_datetime(end_date)
+        if end_date:
+            end_dt = pd.Timestamp(end_date)
+        else:
+            end_dt = children_df['date'].max().normalize()
+            end_date = end_dt.strftime('%Y-%m-%d')
+
+        if start_date:
+            start_dt = pd.Timestamp(start_date)
+        else:
             start_dt = end_dt - timedelta(days=period_months * 30)
             start_date = start_dt.strftime('%Y-%m-%d')
-        
+
         # Apply date filters
-        start_dt = pd.to_datetime(start_date)
-        end_dt = pd.to_datetime(end_date)
         children_df = children_df[(children_df['date'] >= start_dt) & (children_df['date'] <= end_dt)]
         
         # Perform risk factor analysis
@@ -2719,26 +2783,30 @@ async def get_comparative_risk_analysis(
         # Parse time period and apply filters
         period_months = int(time_period) if time_period in ["1", "3", "12"] else 1
         
-        if not end_date:
+        if end_date:
+            end_dt = pd.Timestamp(end_date)
+        else:
             adult_end = adults_df['date'].max()
             child_end = children_df['date'].max()
-            data_end_date = max(adult_end, child_end)
-            end_date = data_end_date.strftime('%Y-%m-%d')
-            
-        if not start_date:
-            end_dt = pd.to_datetime(end_date)
+            end_dt = max(adult_end, child_end).normalize()
+            end_date = end_dt.strftime('%Y-%m-%d')
+
+        if start_date:
+            start_dt = pd.Timestamp(start_date)
+        else:
             start_dt = end_dt - timedelta(days=period_months * 30)
             start_date = start_dt.strftime('%Y-%m-%d')
-        
+
         # Apply date filters
-        start_dt = pd.to_datetime(start_date)
-        end_dt = pd.to_datetime(end_date)
         adults_df = adults_df[(adults_df['date'] >= start_dt) & (adults_df['date'] <= end_dt)]
         children_df = children_df[(children_df['date'] >= start_dt) & (children_df['date'] <= end_dt)]
         
-        # Get risk factors for both outcomes
-        htn_risk_factors = analyze_hypertension_risk_factors(adults_df, households_df)
-        stunting_risk_factors = analyze_stunting_risk_factors(children_df, households_df)
+        # Get risk factors for both outcomes; the analyses are independent, so run them
+        # in worker threads to overlap their pandas work
+        htn_risk_factors, stunting_risk_factors = await asyncio.gather(
+            asyncio.to_thread(analyze_hypertension_risk_factors, adults_df, households_df),
+            asyncio.to_thread(analyze_stunting_risk_factors, children_df, households_df)
+        )
         
         htn_summary = generate_population_risk_summary(htn_risk_factors, 'hypertension')
         stunting_summary = generate_population_risk_summary(stunting_risk_factors, 'stunting')
@@ -2747,12 +2815,17 @@ async def get_comparative_risk_analysis(
         htn_factor_names = {rf['factor'] for rf in htn_risk_factors}
         stunting_factor_names = {rf['factor'] for rf in stunting_risk_factors}
         
+        # Scan each factor name once, then compare keyword bitmasks per pair
+        htn_masks = [factor_keyword_mask(rf['factor']) for rf in htn_risk_factors]
+        stunting_masks = [factor_keyword_mask(rf['factor']) for rf in stunting_risk_factors]
+
         shared_factors = []
-        for htn_rf in htn_risk_factors:
-            for stunting_rf in stunting_risk_factors:
-                # Check for conceptually similar factors
-                if any(keyword in htn_rf['factor'].lower() and keyword in stunting_rf['factor'].lower() 
-                       for keyword in ['income', 'economic', 'house', 'electric', 'internet', 'infrastructure']):
+        for htn_rf, htn_mask in zip(htn_risk_factors, htn_masks):
+            if not htn_mask:
+                continue
+            for stunting_rf, stunting_mask in zip(stunting_risk_factors, stunting_masks):
+                # Check for conceptually similar factors (a keyword present in both names)
+                if htn_mask & stunting_mask:
                     shared_factors.append({
                         'factor_category': 'Socioeconomic/Infrastructure',
                         'hypertension_factor': htn_rf['factor'],
@@ -2807,50 +2880,50 @@ async def get_comparative_risk_analysis(
 # UTILITY ENDPOINTS
 # =============================================================================
 
+def build_households_payload():
+    """Build the /data/households payload from the cached households dataset"""
+    households_df = data_cache['households'][['household_id', 'pendapatan_rt', 'jumlah_anggota']]
+    return {"households": frame_to_records(households_df)}
+
 @app.get("/data/households")
-async def get_households():
+async def get_households(request: Request):
     """Get list of all households"""
     try:
-        households = data_cache['households'][['household_id', 'pendapatan_rt', 'jumlah_anggota']].to_dict('records')
-        # Clean up NaN values
-        for household in households:
-            for key, value in household.items():
-                if pd.isna(value):
-                    household[key] = None
-                elif hasattr(value, 'item'):  # numpy scalars
-                    household[key] = value.item()
-        return {"households": households}
+        return cached_json_response(request, 'households', build_households_payload)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Kesalahan dalam mengambil data rumah tangga: {str(e)}")
 
 @app.get("/data/dusuns")
-async def get_dusuns():
+async def get_dusuns(request: Request):
     """Get list of all dusuns (simulated)"""
-    try:
-        return {"dusuns": ["Dusun_A", "Dusun_B", "Dusun_C", "Dusun_D"]}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Kesalahan dalam mengambil data dusun: {str(e)}")
+    return cached_json_response(request, 'dusuns', lambda: {"dusuns": ["Dusun_A", "Dusun_B", "Dusun_C", "Dusun_D"]})
 
 @app.get("/data/programs")
-async def get_programs():
+async def get_programs(request: Request):
     """Get list of all available programs"""
     try:
-        programs = data_cache['costs_catalog']['program'].unique().tolist()
-        return {"programs": programs}
+        return cached_json_response(request, 'programs', lambda: {"programs": data_cache['costs_catalog']['program'].unique().tolist()})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Kesalahan dalam mengambil data program: {str(e)}")
 
+HEALTH_CACHE_TTL_SECONDS = 1.0
+
 @app.get("/health", tags=["System"])
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "data_loaded": bool(data_cache),
-        "datasets": list(data_cache.keys()) if data_cache else [],
-        "database_connected": True,
-        "api_version": "3.0.0"
-    }
+    """Health check endpoint (body is reused for up to HEALTH_CACHE_TTL_SECONDS)"""
+    now = time.monotonic()
+    cached = response_cache.get('health')
+    if cached is None or now - cached[0] >= HEALTH_CACHE_TTL_SECONDS:
+        cached = (now, orjson.dumps({
+            "status": "healthy",
+            "timestamp": current_iso_timestamp(),
+            "data_loaded": bool(data_cache),
+            "datasets": list(data_cache.keys()) if data_cache else [],
+            "database_connected": True,
+            "api_version": "3.0.0"
+        }))
+        response_cache['health'] = cached
+    return Response(content=cached[1], media_type="application/json")
 
 @app.get("/data/statistics", tags=["Data Statistics"])
 async def get_data_statistics(
@@ -2861,19 +2934,23 @@ async def get_data_statistics(
     """Get comprehensive data statistics"""
     try:
         if use_database:
-            adults_count = db.query(AdultRecord).count()
-            children_count = db.query(ChildRecord).count()
-            households_count = db.query(HouseholdRecord).count()
-            programs_count = db.query(ProgramRecord).count()
+            # Counts and date bounds are aggregated in the database in a single roundtrip
+            count_models = {"adults": AdultRecord, "children": ChildRecord, "households": HouseholdRecord, "programs": ProgramRecord}
+            date_columns = (AdultRecord.date, ChildRecord.date, ProgramRecord.tanggal)
+            stats_row = db.execute(select(
+                *(select(func.count()).select_from(model).scalar_subquery().label(name)
+                  for name, model in count_models.items()),
+                *(select(func.min(column)).scalar_subquery() for column in date_columns),
+                *(select(func.max(column)).scalar_subquery() for column in date_columns)
+            )).one()
+            counts = {name: stats_row._mapping[name] for name in count_models}
+            adults_count, children_count = counts["adults"], counts["children"]
+            households_count, programs_count = counts["households"], counts["programs"]
             
-            # Get date ranges
-            adults_dates = db.query(AdultRecord.date).all()
-            children_dates = db.query(ChildRecord.date).all()
-            program_dates = db.query(ProgramRecord.tanggal).all()
-            
-            all_dates = [d[0] for d in adults_dates + children_dates + program_dates if d[0]]
-            min_date = min(all_dates) if all_dates else None
-            max_date = max(all_dates) if all_dates else None
+            min_dates = [d for d in stats_row[4:7] if d]
+            max_dates = [d for d in stats_row[7:10] if d]
+            min_date = min(min_dates) if min_dates else None
+            max_date = max(max_dates) if max_dates else None
             
         else:
             if not data_cache:
@@ -2884,17 +2961,16 @@ async def get_data_statistics(
             households_count = len(data_cache.get('households', []))
             programs_count = len(data_cache.get('program_log', []))
             
-            # Get date ranges from CSV data
-            all_dates = []
-            if 'adults' in data_cache and not data_cache['adults'].empty:
-                all_dates.extend(data_cache['adults']['date'].tolist())
-            if 'children' in data_cache and not data_cache['children'].empty:
-                all_dates.extend(data_cache['children']['date'].tolist())
-            if 'program_log' in data_cache and not data_cache['program_log'].empty:
-                all_dates.extend(data_cache['program_log']['tanggal'].tolist())
-            
-            min_date = min(all_dates) if all_dates else None
-            max_date = max(all_dates) if all_dates else None
+            # Get date ranges from CSV data (per-column reductions, then min/max over a few scalars)
+            date_columns = [
+                data_cache[key][column]
+                for key, column in (('adults', 'date'), ('children', 'date'), ('program_log', 'tanggal'))
+                if key in data_cache and not data_cache[key].empty
+            ]
+            min_dates = [d for d in (column.min() for column in date_columns) if pd.notna(d)]
+            max_dates = [d for d in (column.max() for column in date_columns) if pd.notna(d)]
+            min_date = min(min_dates) if min_dates else None
+            max_date = max(max_dates) if max_dates else None
         
         return {
             "source": "database" if use_database else "csv_files",
@@ -2910,129 +2986,121 @@ async def get_data_statistics(
                 "latest_record": max_date.isoformat() if max_date else None,
                 "data_span_days": (max_date - min_date).days if min_date and max_date else None
             },
-            "last_updated": datetime.now().isoformat()
+            "last_updated": current_iso_timestamp()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting statistics: {str(e)}")
 
+def frame_to_columns(df):
+    """Convert a DataFrame into a {column: [values]} mapping, formatting datetime columns as ISO strings"""
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            columns[column] = column_to_pylist(series.dt.strftime('%Y-%m-%dT%H:%M:%S'))
+        else:
+            columns[column] = column_to_pylist(series)
+    return columns
+
+# Export table name -> (ORM model, data_cache key)
+EXPORT_TABLES = {
+    "adults": (AdultRecord, "adults"),
+    "children": (ChildRecord, "children"),
+    "households": (HouseholdRecord, "households"),
+    "programs": (ProgramRecord, "program_log"),
+}
+EXPORT_BATCH_SIZE = 1000
+
+def iter_export_ndjson(table: str, use_database: bool):
+    """Yield export records as NDJSON lines, one batch of rows at a time"""
+    tables = {name: spec for name, spec in EXPORT_TABLES.items() if table in (name, "all")}
+    
+    if use_database:
+        # Own session: the stream outlives the request-scoped dependency
+        db = SessionLocal()
+        try:
+            for name, (model, _) in tables.items():
+                result = db.execute(select(model.__table__).execution_options(yield_per=EXPORT_BATCH_SIZE)).mappings()
+                for rows in result.partitions():
+                    yield b"".join(
+                        orjson.dumps({"table": name, "data": dict(row)}) + b"\n"
+                        for row in rows
+                    )
+        finally:
+            db.close()
+    else:
+        if not data_cache:
+            load_data()
+        
+        for name, (_, cache_key) in tables.items():
+            df = data_cache.get(cache_key)
+            if df is None:
+                continue
+            for start in range(0, len(df), EXPORT_BATCH_SIZE):
+                records = frame_to_records(df.iloc[start:start + EXPORT_BATCH_SIZE])
+                yield b"".join(
+                    orjson.dumps({"table": name, "data": record}, default=orjson_default, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+                    for record in records
+                )
+
 @app.get("/data/export", tags=["Data Export"])
 async def export_data(
-    format: str = Query("json", description="Export format: json, csv"),
+    format: str = Query("json", description="Export format: json, ndjson (streamed, one record per line)"),
     table: str = Query("all", description="Table to export: adults, children, households, programs, all"),
     use_database: bool = Query(True, description="Use database instead of CSV files"),
+    layout: str = Query("records", description="JSON layout: records (list of row objects) or columnar (object of column arrays)"),
     db: Session = Depends(get_db),
     api_key: str = Depends(verify_api_key)
 ):
     """Export data in specified format"""
     try:
+        if format.lower() == "ndjson":
+            return StreamingResponse(iter_export_ndjson(table, use_database), media_type="application/x-ndjson")
+        
         export_data = {}
+        record_count = 0
+        columnar = layout.lower() == "columnar"
+        tables = {name: spec for name, spec in EXPORT_TABLES.items() if table in (name, "all")}
         
         if use_database:
-            if table in ["adults", "all"]:
-                adults = db.query(AdultRecord).all()
-                export_data["adults"] = [
-                    {
-                        "id": a.id,
-                        "person_id": a.person_id,
-                        "household_id": a.household_id,
-                        "date": a.date.isoformat(),
-                        "month": a.month,
-                        "age": a.age,
-                        "sistol": a.sistol,
-                        "diastol": a.diastol,
-                        "on_treatment": a.on_treatment,
-                        "diabetes_koin": a.diabetes_koin,
-                        "perokok": a.perokok,
-                        "adherence_current": a.adherence_current,
-                        "created_at": a.created_at.isoformat(),
-                        "updated_at": a.updated_at.isoformat()
-                    } for a in adults
-                ]
-            
-            if table in ["children", "all"]:
-                children = db.query(ChildRecord).all()
-                export_data["children"] = [
-                    {
-                        "id": c.id,
-                        "child_id": c.child_id,
-                        "household_id": c.household_id,
-                        "date": c.date.isoformat(),
-                        "month": c.month,
-                        "usia_bulan": c.usia_bulan,
-                        "HAZ": c.HAZ,
-                        "on_program": c.on_program,
-                        "anemia_hb_gdl": c.anemia_hb_gdl,
-                        "air_bersih": c.air_bersih,
-                        "jamban_sehat": c.jamban_sehat,
-                        "haz_change_this_month": c.haz_change_this_month,
-                        "created_at": c.created_at.isoformat(),
-                        "updated_at": c.updated_at.isoformat()
-                    } for c in children
-                ]
-            
-            if table in ["households", "all"]:
-                households = db.query(HouseholdRecord).all()
-                export_data["households"] = [
-                    {
-                        "id": h.id,
-                        "household_id": h.household_id,
-                        "pendapatan_rt": h.pendapatan_rt,
-                        "kepemilikan_rumah": h.kepemilikan_rumah,
-                        "akses_listrik": h.akses_listrik,
-                        "akses_internet": h.akses_internet,
-                        "created_at": h.created_at.isoformat(),
-                        "updated_at": h.updated_at.isoformat()
-                    } for h in households
-                ]
-            
-            if table in ["programs", "all"]:
-                programs = db.query(ProgramRecord).all()
-                export_data["programs"] = [
-                    {
-                        "id": p.id,
-                        "program": p.program,
-                        "target_id": p.target_id,
-                        "household_id": p.household_id,
-                        "tanggal": p.tanggal.isoformat(),
-                        "biaya_riil": p.biaya_riil,
-                        "status": p.status,
-                        "description": p.description,
-                        "created_at": p.created_at.isoformat(),
-                        "updated_at": p.updated_at.isoformat()
-                    } for p in programs
-                ]
+            # Core selects return plain rows/mappings; orjson renders datetimes as ISO strings
+            for name, (model, _) in tables.items():
+                result = db.execute(select(model.__table__))
+                if columnar:
+                    keys = list(result.keys())
+                    rows = result.all()
+                    columns = list(zip(*rows)) if rows else [()] * len(keys)
+                    export_data[name] = {key: list(values) for key, values in zip(keys, columns)}
+                    record_count += len(rows)
+                else:
+                    export_data[name] = [dict(row) for row in result.mappings()]
+                    record_count += len(export_data[name])
         else:
             # Export from CSV cache
             if not data_cache:
                 load_data()
             
-            if table in ["adults", "all"] and 'adults' in data_cache:
-                export_data["adults"] = data_cache['adults'].to_dict('records')
-            
-            if table in ["children", "all"] and 'children' in data_cache:
-                export_data["children"] = data_cache['children'].to_dict('records')
-            
-            if table in ["households", "all"] and 'households' in data_cache:
-                export_data["households"] = data_cache['households'].to_dict('records')
-            
-            if table in ["programs", "all"] and 'program_log' in data_cache:
-                export_data["programs"] = data_cache['program_log'].to_dict('records')
+            for name, (_, cache_key) in tables.items():
+                if cache_key in data_cache:
+                    df = data_cache[cache_key]
+                    export_data[name] = frame_to_columns(df) if columnar else frame_to_records(df)
+                    record_count += len(df)
         
         # Return based on format
         if format.lower() == "json":
-            return {
+            return Response(content=orjson.dumps({
                 "export_info": {
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": current_iso_timestamp(),
                     "source": "database" if use_database else "csv_files",
                     "table": table,
                     "format": format,
-                    "record_count": sum(len(v) for v in export_data.values()) if isinstance(list(export_data.values())[0], list) else len(list(export_data.values())[0]) if export_data else 0
+                    "record_count": record_count
                 },
                 "data": export_data
-            }
+            }, default=orjson_default, option=orjson.OPT_SERIALIZE_NUMPY), media_type="application/json")
         else:
-            raise HTTPException(status_code=400, detail="Only JSON format is currently supported")
+            raise HTTPException(status_code=400, detail="Only JSON and NDJSON formats are currently supported")
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
@@ -3047,32 +3115,34 @@ async def test_authentication(api_key: str = Depends(verify_api_key)):
     return {
         "message": "Authentication successful",
         "api_key_valid": True,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": current_iso_timestamp()
     }
 
+AUTH_INFO_JSON = orjson.dumps({
+    "authentication_required": True,
+    "authentication_type": "Bearer Token",
+    "header_format": "Authorization: Bearer <your_api_key>",
+    "protected_endpoints": [
+        "All CRUD operations (/adults/, /children/, /households/, /programs/)",
+        "Bulk operations (/*/bulk/)",
+        "Data migration (/data/migrate-csv/)",
+        "Data statistics (/data/statistics)",
+        "Data export (/data/export)",
+        "ML predictions (/predictions/*)",
+        "Authentication test (/auth/test)"
+    ],
+    "public_endpoints": [
+        "Health check (/health)",
+        "Authentication info (/auth/info)",
+        "Dashboard endpoints (/dashboard/*) - read-only",
+        "API documentation (/docs, /redoc)"
+    ]
+})
+
 @app.get("/auth/info", tags=["Authentication"])
 async def get_auth_info():
     """Get authentication information (public endpoint)"""
-    return {
-        "authentication_required": True,
-        "authentication_type": "Bearer Token",
-        "header_format": "Authorization: Bearer <your_api_key>",
-        "protected_endpoints": [
-            "All CRUD operations (/adults/, /children/, /households/, /programs/)",
-            "Bulk operations (/*/bulk/)",
-            "Data migration (/data/migrate-csv/)",
-            "Data statistics (/data/statistics)",
-            "Data export (/data/export)",
-            "ML predictions (/predictions/*)",
-            "Authentication test (/auth/test)"
-        ],
-        "public_endpoints": [
-            "Health check (/health)",
-            "Authentication info (/auth/info)",
-            "Dashboard endpoints (/dashboard/*) - read-only",
-            "API documentation (/docs, /redoc)"
-        ]
-    }
+    return Response(content=AUTH_INFO_JSON, media_type="application/json")
 
 # =============================================================================
 # STARTUP EVENT
@@ -3082,11 +3152,13 @@ async def get_auth_info():
 # ML PREDICTION ENDPOINTS
 # =============================================================================
 
-@app.get("/predictions/health-outcomes/{person_id}")
+predictions_router = APIRouter(prefix="/predictions")
+
+@predictions_router.get("/health-outcomes/{person_id}")
 async def get_health_outcome_predictions(
     person_id: str,
-    months_ahead: int = Query(6, description="Months ahead to predict (1-24)"),
-    intervention_scenario: str = Query("current", description="Intervention scenario: current, enhanced, minimal")
+    months_ahead: Annotated[int, Query(ge=1, le=24, description="Months ahead to predict (1-24)")] = 6,
+    intervention_scenario: Annotated[str, Query(description="Intervention scenario: current, enhanced, minimal")] = "current"
 ):
     """
     Predict future health outcomes for a specific individual
@@ -3099,11 +3171,11 @@ async def get_health_outcome_predictions(
         # Determine if this is an adult or child
         if person_id.startswith('P'):
             # Adult - get from adults longitudinal data
-            adults_df = data_cache.get('adults', pd.DataFrame())
+            adults_df = data_cache.get('adults', _EMPTY_DF)
             if adults_df.empty:
                 raise HTTPException(status_code=503, detail="Adults longitudinal data not available")
             
-            person_data = adults_df[adults_df['person_id'] == person_id]
+            person_data = get_person_rows('adults', 'person_id', person_id)
             if person_data.empty:
                 raise HTTPException(status_code=404, detail=f"Dewasa {person_id} tidak ditemukan")
             
@@ -3111,11 +3183,11 @@ async def get_health_outcome_predictions(
             
         elif person_id.startswith('C'):
             # Child - get from children longitudinal data  
-            children_df = data_cache.get('children', pd.DataFrame())
+            children_df = data_cache.get('children', _EMPTY_DF)
             if children_df.empty:
                 raise HTTPException(status_code=503, detail="Children longitudinal data not available")
             
-            person_data = children_df[children_df['child_id'] == person_id]
+            person_data = get_person_rows('children', 'child_id', person_id)
             if person_data.empty:
                 raise HTTPException(status_code=404, detail=f"Anak {person_id} tidak ditemukan")
             
@@ -3137,11 +3209,39 @@ async def get_health_outcome_predictions(
         print(f"Error in health outcome prediction: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating health prediction: {str(e)}")
 
-@app.get("/predictions/population-risk")
+@lru_cache(maxsize=64)
+def compute_population_risk(population_type: str, risk_threshold: float, data_version: str):
+    """
+    Population risk components for the loaded data; data_version (the data ETag) keys out stale results
+
+    Every component but the population count is returned pre-serialized, so the
+    cached results shared between requests cannot be mutated by any of them.
+    """
+    if population_type == "adults":
+        # Get latest data per person for risk calculation
+        latest_data = get_latest_records('adults', 'person_id')
+        risk_analysis = calculate_population_risk_scores(latest_data, 'adults')
+        high_risk_individuals = _identify_high_risk_adults(latest_data, risk_threshold)
+        df = data_cache['adults']
+    else:  # children
+        latest_data = get_latest_records('children', 'child_id')
+        risk_analysis = calculate_population_risk_scores(latest_data, 'children')
+        high_risk_individuals = _identify_high_risk_children(latest_data, risk_threshold)
+        df = data_cache['children']
+    
+    return (
+        len(latest_data),
+        json_fragment(risk_analysis),
+        json_fragment(high_risk_individuals),
+        json_fragment(_generate_population_interventions(high_risk_individuals, population_type)),
+        json_fragment(_detect_early_warning_signs(df, population_type))
+    )
+
+@predictions_router.get("/population-risk")
 async def get_population_risk_predictions(
-    population_type: str = Query("adults", description="Population type: adults or children"),
-    risk_threshold: float = Query(0.7, description="Risk threshold for high-risk classification (0-1)"),
-    time_period: int = Query(3, description="Time period for analysis in months")
+    population_type: Annotated[str, Query(description="Population type: adults or children")] = "adults",
+    risk_threshold: Annotated[float, Query(ge=0, le=1, description="Risk threshold for high-risk classification (0-1)")] = 0.7,
+    time_period: Annotated[int, Query(description="Time period for analysis in months")] = 3
 ):
     """
     Get ML-enhanced population risk stratification and early warning alerts
@@ -3150,44 +3250,36 @@ async def get_population_risk_predictions(
         print(f"Starting population risk analysis for {population_type}...")
         
         if population_type == "adults":
-            df = data_cache.get('adults', pd.DataFrame())
+            df = data_cache.get('adults', _EMPTY_DF)
             if df.empty:
                 raise HTTPException(status_code=503, detail="Adults data not available")
-            
-            # Get latest data per person for risk calculation
-            latest_adult_data = df.groupby('person_id').last().reset_index()
-            
-            risk_analysis = calculate_population_risk_scores(latest_adult_data, 'adults')
-            
-            # Identify high-risk individuals
-            high_risk_individuals = _identify_high_risk_adults(latest_adult_data, risk_threshold)
-            
         else:  # children
-            df = data_cache.get('children', pd.DataFrame())
+            df = data_cache.get('children', _EMPTY_DF)
             if df.empty:
                 raise HTTPException(status_code=503, detail="Children data not available")
-            
-            latest_child_data = df.groupby('child_id').last().reset_index()
-            
-            risk_analysis = calculate_population_risk_scores(latest_child_data, 'children')
-            
-            high_risk_individuals = _identify_high_risk_children(latest_child_data, risk_threshold)
+        
+        # Thresholds are quantized so near-identical values share one cache entry
+        risk_threshold = round(risk_threshold, 2)
+        total_population, risk_analysis, high_risk_individuals, interventions, early_warnings = compute_population_risk(
+            population_type, risk_threshold, data_etag
+        )
         
         result = {
             "population_type": population_type,
             "analysis_parameters": {
                 "risk_threshold": risk_threshold,
                 "time_period_months": time_period,
-                "total_population": len(latest_adult_data if population_type == "adults" else latest_child_data)
+                "total_population": total_population
             },
             "risk_stratification": risk_analysis,
             "high_risk_alerts": high_risk_individuals,
-            "intervention_recommendations": _generate_population_interventions(high_risk_individuals, population_type),
-            "indikator_peringatan_dini": _detect_early_warning_signs(df, population_type)
+            "intervention_recommendations": interventions,
+            "indikator_peringatan_dini": early_warnings
         }
         
         print(f"Population risk analysis completed for {population_type}")
-        return result
+        # Returned as a response so the cached fragments skip FastAPI's jsonable_encoder
+        return OrjsonResponse(content=result)
         
     except HTTPException:
         raise
@@ -3195,12 +3287,12 @@ async def get_population_risk_predictions(
         print(f"Error in population risk analysis: {e}")
         raise HTTPException(status_code=500, detail=f"Error in population risk analysis: {str(e)}")
 
-@app.get("/predictions/treatment-response/{person_id}")
+@predictions_router.get("/treatment-response/{person_id}")
 async def predict_treatment_response(
     person_id: str,
-    intervention_type: str = Query(..., description="Intervention type (e.g., 'ACEi', 'PMT', 'WASH')"),
-    duration_months: int = Query(6, description="Treatment duration in months"),
-    adherence_scenario: float = Query(0.8, description="Expected adherence rate (0-1)")
+    intervention_type: Annotated[str, Query(description="Intervention type (e.g., 'ACEi', 'PMT', 'WASH')")],
+    duration_months: Annotated[int, Query(description="Treatment duration in months")] = 6,
+    adherence_scenario: Annotated[float, Query(ge=0, le=1, description="Expected adherence rate (0-1)")] = 0.8
 ):
     """
     Predict individual treatment response for specific interventions
@@ -3210,12 +3302,10 @@ async def predict_treatment_response(
         
         # Get person's data
         if person_id.startswith('P'):
-            df = data_cache.get('adults', pd.DataFrame())
-            person_data = df[df['person_id'] == person_id] if not df.empty else pd.DataFrame()
+            person_data = get_person_rows('adults', 'person_id', person_id)
             person_type = 'adult'
         else:
-            df = data_cache.get('children', pd.DataFrame())  
-            person_data = df[df['child_id'] == person_id] if not df.empty else pd.DataFrame()
+            person_data = get_person_rows('children', 'child_id', person_id)
             person_type = 'child'
         
         if person_data.empty:
@@ -3224,9 +3314,10 @@ async def predict_treatment_response(
         # Get baseline prediction
         baseline_prediction = predict_health_outcomes(person_data, person_type, duration_months)
         
-        # Simulate treatment response
+        # Simulate treatment response from the latest record (taken once, shared with the recommendations)
+        latest_record = person_data.iloc[-1].to_dict()
         treatment_response = _simulate_treatment_response(
-            person_data, intervention_type, duration_months, adherence_scenario, person_type
+            latest_record, intervention_type, duration_months, adherence_scenario, person_type
         )
         
         result = {
@@ -3240,7 +3331,7 @@ async def predict_treatment_response(
             "treatment_response": treatment_response,
             "comparative_analysis": _compare_treatment_scenarios(baseline_prediction, treatment_response),
             "personalized_recommendations": _generate_personalized_recommendations(
-                person_data, treatment_response, person_type
+                latest_record, treatment_response, person_type
             )
         }
         
@@ -3253,6 +3344,8 @@ async def predict_treatment_response(
         print(f"Error in treatment response prediction: {e}")
         raise HTTPException(status_code=500, detail=f"Error predicting treatment response: {str(e)}")
 
+app.include_router(predictions_router)
+
 # =============================================================================
 # ML HELPER FUNCTIONS
 # =============================================================================
@@ -3280,51 +3373,95 @@ def _analyze_intervention_scenarios(person_data: pd.DataFrame, baseline_predicti
         "estimated_improvement": f"{round(impact_factor * 10, 1)}% over baseline"
     }
 
+def _column_or_default(df: pd.DataFrame, column: str, default) -> pd.Series:
+    """Return a column, or a constant Series of default when the column is missing"""
+    return df[column] if column in df.columns else pd.Series(default, index=df.index)
+
+def _factor_score_table(weights) -> np.ndarray:
+    """Risk score for every factor bitmask, accumulated in factor order like the original per-row scoring"""
+    table = np.zeros(1 << len(weights))
+    for bitmask in range(len(table)):
+        score = 0.0
+        for bit, weight in enumerate(weights):
+            if bitmask >> bit & 1:
+                score += weight
+        table[bitmask] = score
+    return table
+
+def _factor_bitmasks(factors: np.ndarray) -> np.ndarray:
+    """Pack a boolean (rows x factors) matrix into one integer bitmask per row (bit i = factor i)"""
+    return np.packbits(factors, axis=1, bitorder='little')[:, 0]
+
+# Adult risk factor labels and weights, in the column order of _adult_risk_components' factor matrix
+ADULT_RISK_FACTORS = np.array(["Severe hypertension", "Hypertension", "Advanced age", "Diabetes", "Smoking", "Poor adherence"], dtype=object)
+ADULT_RISK_SCORE_TABLE = _factor_score_table((0.4, 0.2, 0.2, 0.3, 0.2, 0.2))
+
+def _adult_risk_components(adults_df: pd.DataFrame):
+    """Vectorized adult risk scores plus a boolean (rows x ADULT_RISK_FACTORS) factor matrix"""
+    systolic = _column_or_default(adults_df, 'sistol', 0)
+    age = adults_df['age'] if 'age' in adults_df.columns else _column_or_default(adults_df, 'usia', 0)
+    on_treatment = _column_or_default(adults_df, 'on_treatment', 0).astype(bool)
+    adherence = _column_or_default(adults_df, 'adherence_current', 1)
+    
+    severe_hypertension = (systolic >= 160).to_numpy()
+    hypertension = ~severe_hypertension & (systolic >= 140).to_numpy()
+    advanced_age = (age >= 65).to_numpy()
+    diabetes = _column_or_default(adults_df, 'diabetes_koin', 0).astype(bool).to_numpy()
+    smoking = _column_or_default(adults_df, 'perokok', 0).astype(bool).to_numpy()
+    poor_adherence = (on_treatment & (adherence < 0.8)).to_numpy()
+    
+    factors = np.column_stack([severe_hypertension, hypertension, advanced_age, diabetes, smoking, poor_adherence])
+    # One table gather per row instead of a chain of np.where temporaries
+    return ADULT_RISK_SCORE_TABLE[_factor_bitmasks(factors)], factors
+
+# Child risk factor labels and weights, in the column order of _child_risk_components' factor matrix
+CHILD_RISK_FACTORS = np.array(["Severe stunting", "Moderate stunting", "Critical age period", "Severe anemia", "Anemia", "No clean water", "Poor sanitation"], dtype=object)
+CHILD_RISK_SCORE_TABLE = _factor_score_table((0.5, 0.3, 0.2, 0.3, 0.2, 0.1, 0.1))
+
+def _child_risk_components(children_df: pd.DataFrame):
+    """Vectorized child risk scores plus a boolean (rows x CHILD_RISK_FACTORS) factor matrix"""
+    haz = _column_or_default(children_df, 'HAZ', 0)
+    hemoglobin = _column_or_default(children_df, 'anemia_hb_gdl', 12)
+    
+    severe_stunting = (haz < -3).to_numpy()
+    moderate_stunting = ~severe_stunting & (haz < -2).to_numpy()
+    critical_age = (_column_or_default(children_df, 'usia_bulan', 24) < 24).to_numpy()
+    severe_anemia = (hemoglobin < 10).to_numpy()
+    anemia = ~severe_anemia & (hemoglobin < 11).to_numpy()
+    no_clean_water = ~_column_or_default(children_df, 'air_bersih', 1).astype(bool).to_numpy()
+    poor_sanitation = ~_column_or_default(children_df, 'jamban_sehat', 1).astype(bool).to_numpy()
+    
+    factors = np.column_stack([severe_stunting, moderate_stunting, critical_age, severe_anemia, anemia, no_clean_water, poor_sanitation])
+    return CHILD_RISK_SCORE_TABLE[_factor_bitmasks(factors)], factors
+
 def _identify_high_risk_adults(adults_df: pd.DataFrame, threshold: float) -> List[Dict[str, Any]]:
     """Identify high-risk adults based on multiple factors"""
     
     high_risk_adults = []
     
-    for _, person in adults_df.iterrows():
-        risk_score = 0.0
-        risk_factors = []
-        
-        # BP risk
-        if person.get('sistol', 0) >= 160:
-            risk_score += 0.4
-            risk_factors.append("Severe hypertension")
-        elif person.get('sistol', 0) >= 140:
-            risk_score += 0.2
-            risk_factors.append("Hypertension")
-        
-        # Age risk
-        if person.get('age', person.get('usia', 0)) >= 65:
-            risk_score += 0.2
-            risk_factors.append("Advanced age")
-        
-        # Comorbidity risk
-        if person.get('diabetes_koin', 0):
-            risk_score += 0.3
-            risk_factors.append("Diabetes")
-        
-        if person.get('perokok', 0):
-            risk_score += 0.2
-            risk_factors.append("Smoking")
-        
-        # Treatment adherence
-        if person.get('on_treatment', 0) and person.get('adherence_current', 1) < 0.8:
-            risk_score += 0.2
-            risk_factors.append("Poor adherence")
-        
-        if risk_score >= threshold:
-            high_risk_adults.append({
-                "person_id": person['person_id'],
-                "risk_score": round(risk_score, 3),
-                "risk_factors": risk_factors,
-                "urgency": "high" if risk_score >= 0.8 else "medium",
-                "current_bp": f"{person.get('sistol', 0)}/{person.get('diastol', 0)}",
-                "recommendations": _get_urgent_recommendations(risk_factors, 'adult')
-            })
+    # Score everyone in one vectorized pass; only rows over the threshold need dicts
+    scores, factor_matrix = _adult_risk_components(adults_df)
+    selected = np.flatnonzero(scores >= threshold)
+    
+    person_ids = adults_df['person_id'].to_numpy()[selected].tolist()
+    selected_scores = scores[selected]
+    risk_scores = selected_scores.tolist()
+    rounded_scores = np.round(selected_scores, 3).tolist()
+    # "sys/dia" strings built in one pass (NumPy's str conversion matches str() per value)
+    systolic = _column_or_default(adults_df, 'sistol', 0).to_numpy()[selected].astype(str)
+    diastolic = _column_or_default(adults_df, 'diastol', 0).to_numpy()[selected].astype(str)
+    current_bp = np.char.add(np.char.add(systolic, '/'), diastolic).tolist()
+    
+    for i, position in enumerate(selected):
+        risk_factors = ADULT_RISK_FACTORS[factor_matrix[position]].tolist()
+        high_risk_adults.append({
+            "person_id": person_ids[i],
+            "risk_score": rounded_scores[i],
+            "risk_factors": risk_factors,
+            "urgency": "high" if risk_scores[i] >= 0.8 else "medium",
+            "current_bp": current_bp[i],
+            "recommendations": _get_urgent_recommendations(risk_factors, 'adult')
+        })
     
     return high_risk_adults
 
@@ -3333,150 +3470,151 @@ def _identify_high_risk_children(children_df: pd.DataFrame, threshold: float) ->
     
     high_risk_children = []
     
-    for _, child in children_df.iterrows():
-        risk_score = 0.0
-        risk_factors = []
-        
-        # HAZ risk
-        if child.get('HAZ', 0) < -3:
-            risk_score += 0.5
-            risk_factors.append("Severe stunting")
-        elif child.get('HAZ', 0) < -2:
-            risk_score += 0.3
-            risk_factors.append("Moderate stunting")
-        
-        # Age risk (younger children more vulnerable)
-        if child.get('usia_bulan', 24) < 24:
-            risk_score += 0.2
-            risk_factors.append("Critical age period")
-        
-        # Anemia risk
-        if child.get('anemia_hb_gdl', 12) < 10:
-            risk_score += 0.3
-            risk_factors.append("Severe anemia")
-        elif child.get('anemia_hb_gdl', 12) < 11:
-            risk_score += 0.2
-            risk_factors.append("Anemia")
-        
-        # Environmental risks
-        if not child.get('air_bersih', 1):
-            risk_score += 0.1
-            risk_factors.append("No clean water")
-        
-        if not child.get('jamban_sehat', 1):
-            risk_score += 0.1
-            risk_factors.append("Poor sanitation")
-        
-        if risk_score >= threshold:
-            high_risk_children.append({
-                "child_id": child['child_id'],
-                "risk_score": round(risk_score, 3),
-                "risk_factors": risk_factors,
-                "urgency": "high" if risk_score >= 0.8 else "medium",
-                "current_haz": child.get('HAZ', 0),
-                "age_months": child.get('usia_bulan', 0),
-                "recommendations": _get_urgent_recommendations(risk_factors, 'child')
-            })
+    # Score everyone in one vectorized pass; only rows over the threshold need dicts
+    scores, factor_matrix = _child_risk_components(children_df)
+    selected = np.flatnonzero(scores >= threshold)
+    
+    child_ids = children_df['child_id'].to_numpy()[selected].tolist()
+    haz = _column_or_default(children_df, 'HAZ', 0).to_numpy()[selected].tolist()
+    age_months = _column_or_default(children_df, 'usia_bulan', 0).to_numpy()[selected].tolist()
+    selected_scores = scores[selected]
+    risk_scores = selected_scores.tolist()
+    rounded_scores = np.round(selected_scores, 3).tolist()
+    
+    for i, position in enumerate(selected):
+        risk_factors = CHILD_RISK_FACTORS[factor_matrix[position]].tolist()
+        high_risk_children.append({
+            "child_id": child_ids[i],
+            "risk_score": rounded_scores[i],
+            "risk_factors": risk_factors,
+            "urgency": "high" if risk_scores[i] >= 0.8 else "medium",
+            "current_haz": haz[i],
+            "age_months": age_months[i],
+            "recommendations": _get_urgent_recommendations(risk_factors, 'child')
+        })
     
     return high_risk_children
 
-def _simulate_treatment_response(person_data: pd.DataFrame, intervention: str, duration: int, adherence: float, person_type: str) -> Dict[str, Any]:
-    """Simulate treatment response based on intervention type"""
-    
-    print(f"🔧 Simulating treatment: {intervention}, duration: {duration}, adherence: {adherence}")
-    
-    latest = person_data.iloc[-1]
+# Adult intervention -> (max systolic reduction, max diastolic reduction, base success rate)
+ADULT_TREATMENT_EFFECTS = {
+    'acei': (12, 8, 0.85),
+    'ccb': (10, 6, 0.82),
+    'diuretik': (8, 5, 0.80),
+    'lifestyle': (6, 4, 0.70),
+}
+DEFAULT_ADULT_TREATMENT_EFFECT = (6, 4, 0.75)  # Default medication
+
+# Child intervention -> (max HAZ improvement, base success rate)
+CHILD_TREATMENT_EFFECTS = {
+    'pmt': (0.4, 0.85),
+    'mikronutrien': (0.25, 0.80),
+    'wash': (0.2, 0.75),
+    'konseling': (0.15, 0.70),
+}
+DEFAULT_CHILD_TREATMENT_EFFECT = (0.1, 0.65)
+
+def _latest_column(latest_df: pd.DataFrame, column: str, default: float) -> np.ndarray:
+    """Float array of a latest-record column, or the default when the column is absent"""
+    if column in latest_df.columns:
+        return latest_df[column].to_numpy(dtype=float)
+    return np.full(len(latest_df), default, dtype=float)
+
+def _simulate_treatment_response_batch(latest_df: pd.DataFrame, interventions: np.ndarray, durations: np.ndarray,
+                                       adherences: np.ndarray, person_type: str) -> pd.DataFrame:
+    """Simulate treatment response for many latest records at once (one row per person)"""
+    
+    durations = np.asarray(durations, dtype=float)
+    adherences = np.asarray(adherences, dtype=float)
+    # Normalize intervention names to lowercase for consistency
+    intervention_names = [str(intervention).lower() for intervention in interventions]
     
     if person_type == 'adult':
         # BP treatment simulation
-        current_sys = latest.get('sistol', 140)
-        current_dia = latest.get('diastol', 90)
-        
-        # Normalize intervention name to lowercase for consistency
-        intervention_lower = intervention.lower()
-        
-        if intervention_lower == 'acei':
-            sys_reduction = 12 * adherence * min(1, duration / 6)
-            dia_reduction = 8 * adherence * min(1, duration / 6)
-            success_base = 0.85
-        elif intervention_lower == 'ccb':
-            sys_reduction = 10 * adherence * min(1, duration / 6)
-            dia_reduction = 6 * adherence * min(1, duration / 6)
-            success_base = 0.82
-        elif intervention_lower == 'diuretik':
-            sys_reduction = 8 * adherence * min(1, duration / 6)
-            dia_reduction = 5 * adherence * min(1, duration / 6)
-            success_base = 0.80
-        elif intervention_lower == 'lifestyle':
-            sys_reduction = 6 * adherence * min(1, duration / 6)
-            dia_reduction = 4 * adherence * min(1, duration / 6)
-            success_base = 0.70
-        else:
-            # Default medication
-            sys_reduction = 6 * adherence * min(1, duration / 6)
-            dia_reduction = 4 * adherence * min(1, duration / 6)
-            success_base = 0.75
+        current_sys = _latest_column(latest_df, 'sistol', 140)
+        current_dia = _latest_column(latest_df, 'diastol', 90)
         
-        predicted_sys = max(90, current_sys - sys_reduction)
-        predicted_dia = max(60, current_dia - dia_reduction)
+        effects = np.array([
+            ADULT_TREATMENT_EFFECTS.get(name, DEFAULT_ADULT_TREATMENT_EFFECT) for name in intervention_names
+        ], dtype=float).reshape(-1, 3)
+        max_sys_reduction, max_dia_reduction, success_base = effects.T
         
-        # Calculate probability based on adherence, intervention type, and patient factors
-        probability = min(0.95, success_base * adherence * (1 + 0.1 if current_sys < 160 else 0))
+        duration_factor = np.fmin(1, durations / 6)
+        sys_reduction = max_sys_reduction * adherences * duration_factor
+        dia_reduction = max_dia_reduction * adherences * duration_factor
         
-        return {
-            "hasil_prediksi": {
-                "sistolik": round(predicted_sys, 1),
-                "diastolik": round(predicted_dia, 1)
-            },
-            "perbaikan_yang_diharapkan": {
-                "penurunan_sistolik": round(sys_reduction, 1),
-                "penurunan_diastolik": round(dia_reduction, 1)
-            },
-            "probabilitas_keberhasilan": round(probability, 2)
-        }
-    
-    else:
-        # Child nutrition intervention simulation
-        current_haz = latest.get('HAZ', -1)
-        age_months = latest.get('usia_bulan', 24)
-        
-        # Normalize intervention name
-        intervention_lower = intervention.lower()
-        
-        # Age factor - younger children respond better
-        age_factor = max(0.3, 1 - age_months / 60)
-        
-        if intervention_lower == 'pmt':
-            haz_improvement = 0.4 * adherence * min(1, duration / 12) * age_factor
-            success_base = 0.85
-        elif intervention_lower == 'mikronutrien':
-            haz_improvement = 0.25 * adherence * min(1, duration / 12) * age_factor
-            success_base = 0.80
-        elif intervention_lower == 'wash':
-            haz_improvement = 0.2 * adherence * min(1, duration / 12) * age_factor
-            success_base = 0.75
-        elif intervention_lower == 'konseling':
-            haz_improvement = 0.15 * adherence * min(1, duration / 12) * age_factor
-            success_base = 0.70
-        else:
-            haz_improvement = 0.1 * adherence * min(1, duration / 12) * age_factor
-            success_base = 0.65
-        
-        predicted_haz = min(3, current_haz + haz_improvement)
-        
-        # Calculate probability based on intervention type and child factors
-        probability = min(0.95, success_base * adherence * age_factor)
+        # fmax/fmin (not maximum/minimum) so missing readings fall back to the bound like max()/min() did
+        predicted_sys = np.fmax(90, current_sys - sys_reduction)
+        predicted_dia = np.fmax(60, current_dia - dia_reduction)
         
+        # Calculate probability based on adherence, intervention type, and patient factors
+        # (a 10% bonus below 160 mmHg; severe hypertension keeps the base rate)
+        probability = np.fmin(0.95, success_base * adherences * np.where(current_sys < 160, 1.1, 1.0))
+        
+        return pd.DataFrame({
+            'predicted_sys': predicted_sys,
+            'predicted_dia': predicted_dia,
+            'sys_reduction': sys_reduction,
+            'dia_reduction': dia_reduction,
+            'probability': probability
+        }, index=latest_df.index)
+    
+    # Child nutrition intervention simulation
+    current_haz = _latest_column(latest_df, 'HAZ', -1)
+    age_months = _latest_column(latest_df, 'usia_bulan', 24)
+    
+    # Age factor - younger children respond better
+    age_factor = np.fmax(0.3, 1 - age_months / 60)
+    
+    effects = np.array([
+        CHILD_TREATMENT_EFFECTS.get(name, DEFAULT_CHILD_TREATMENT_EFFECT) for name in intervention_names
+    ], dtype=float).reshape(-1, 2)
+    max_haz_improvement, success_base = effects.T
+    haz_improvement = max_haz_improvement * adherences * np.fmin(1, durations / 12) * age_factor
+    
+    predicted_haz = np.fmin(3, current_haz + haz_improvement)
+    
+    # Calculate probability based on intervention type and child factors
+    probability = np.fmin(0.95, success_base * adherences * age_factor)
+    
+    return pd.DataFrame({
+        'predicted_haz': predicted_haz,
+        'haz_improvement': haz_improvement,
+        'probability': probability
+    }, index=latest_df.index)
+
+def _simulate_treatment_response(latest_record: Dict[str, Any], intervention: str, duration: int, adherence: float, person_type: str) -> Dict[str, Any]:
+    """Simulate treatment response based on intervention type"""
+    
+    print(f"🔧 Simulating treatment: {intervention}, duration: {duration}, adherence: {adherence}")
+    
+    response = _simulate_treatment_response_batch(
+        pd.DataFrame([latest_record]), [intervention], [duration], [adherence], person_type
+    ).iloc[0]
+    
+    if person_type == 'adult':
         return {
             "hasil_prediksi": {
-                "haz": round(predicted_haz, 2),
-                "risiko_stunting": "rendah" if predicted_haz >= -1 else "sedang" if predicted_haz >= -2 else "tinggi"
+                "sistolik": round(float(response['predicted_sys']), 1),
+                "diastolik": round(float(response['predicted_dia']), 1)
             },
             "perbaikan_yang_diharapkan": {
-                "peningkatan_haz": round(haz_improvement, 2)
+                "penurunan_sistolik": round(float(response['sys_reduction']), 1),
+                "penurunan_diastolik": round(float(response['dia_reduction']), 1)
             },
-            "probabilitas_keberhasilan": round(probability, 2)
+            "probabilitas_keberhasilan": round(float(response['probability']), 2)
         }
+    
+    predicted_haz = float(response['predicted_haz'])
+    return {
+        "hasil_prediksi": {
+            "haz": round(predicted_haz, 2),
+            "risiko_stunting": "rendah" if predicted_haz >= -1 else "sedang" if predicted_haz >= -2 else "tinggi"
+        },
+        "perbaikan_yang_diharapkan": {
+            "peningkatan_haz": round(float(response['haz_improvement']), 2)
+        },
+        "probabilitas_keberhasilan": round(float(response['probability']), 2)
+    }
 
 def _generate_population_interventions(high_risk_individuals: List[Dict], population_type: str) -> List[str]:
     """Generate population-level intervention recommendations"""
@@ -3511,18 +3649,22 @@ def _detect_early_warning_signs(df: pd.DataFrame, population_type: str) -> List[
     if df.empty:
         return warnings
     
-    # Convert date column if it exists
+    # Convert date column if it exists (without mutating the caller's frame)
     if 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'])
+        dates = df['date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates)
         
         # Analyze recent trends (last 3 months)
-        recent_data = df[df['date'] >= df['date'].max() - timedelta(days=90)]
+        date_values = dates.to_numpy()
+        recent = date_values >= date_values.max() - np.timedelta64(90, 'D')
         
         if population_type == "adults":
             # Check for increasing BP trends
-            if 'sistol' in recent_data.columns:
-                recent_avg_sys = recent_data['sistol'].mean()
-                overall_avg_sys = df['sistol'].mean()
+            if 'sistol' in df.columns:
+                systolic = df['sistol'].to_numpy(dtype=np.float64, na_value=np.nan)
+                recent_avg_sys = np.nanmean(systolic[recent])
+                overall_avg_sys = np.nanmean(systolic)
                 
                 if recent_avg_sys > overall_avg_sys + 5:
                     warnings.append({
@@ -3534,9 +3676,10 @@ def _detect_early_warning_signs(df: pd.DataFrame, population_type: str) -> List[
         
         else:
             # Check for worsening growth trends in children
-            if 'HAZ' in recent_data.columns:
-                recent_avg_haz = recent_data['HAZ'].mean()
-                overall_avg_haz = df['HAZ'].mean()
+            if 'HAZ' in df.columns:
+                haz = df['HAZ'].to_numpy(dtype=np.float64, na_value=np.nan)
+                recent_avg_haz = np.nanmean(haz[recent])
+                overall_avg_haz = np.nanmean(haz)
                 
                 if recent_avg_haz < overall_avg_haz - 0.2:
                     warnings.append({
@@ -3567,10 +3710,9 @@ def _compare_treatment_scenarios(baseline: Dict, treatment: Dict) -> Dict[str, A
     
     return comparison
 
-def _generate_personalized_recommendations(person_data: pd.DataFrame, treatment_response: Dict, person_type: str) -> List[str]:
+def _generate_personalized_recommendations(latest: Dict[str, Any], treatment_response: Dict, person_type: str) -> List[str]:
     """Generate personalized recommendations based on individual characteristics"""
     
-    latest = person_data.iloc[-1]
     recommendations = []
     
     if person_type == 'adult':
@@ -3601,8 +3743,9 @@ def _generate_personalized_recommendations(person_data: pd.DataFrame, treatment_
     
     return recommendations
 
-def _get_urgent_recommendations(risk_factors: List[str], person_type: str) -> List[str]:
-    """Get urgent recommendations based on risk factors"""
+@lru_cache(maxsize=256)
+def _urgent_recommendations_for(risk_factors: frozenset, person_type: str) -> tuple:
+    """Urgent recommendations for a set of risk factors (memoized; the factor combinations are few)"""
     
     recommendations = []
     
@@ -3618,7 +3761,11 @@ def _get_urgent_recommendations(risk_factors: List[str], person_type: str) -> Li
     if "Severe anemia" in risk_factors:
         recommendations.append("URGENT: Iron supplementation and medical evaluation")
     
-    return recommendations
+    return tuple(recommendations)
+
+def _get_urgent_recommendations(risk_factors: List[str], person_type: str) -> List[str]:
+    """Get urgent recommendations based on risk factors"""
+    return list(_urgent_recommendations_for(frozenset(risk_factors), person_type))
 
 @app.on_event("startup")
 async def startup_event():
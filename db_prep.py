@@ -0,0 +1,103 @@
+"""
+CSV-to-database preparation helpers for the Digital Twin Health Dashboard
+
+Shared by the server's migration endpoint and migrate.py, without importing
+the FastAPI application.
+"""
+
+import pandas as pd
+from datetime import datetime
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+def filled_column(frame: pd.DataFrame, name: str, default) -> pd.Series:
+    """Return frame[name] with missing values filled, or a constant column when it is absent"""
+    if name in frame.columns:
+        return frame[name].fillna(default)
+    return pd.Series(default, index=frame.index)
+
+def numeric_column(frame: pd.DataFrame, name: str, default) -> pd.Series:
+    """Return frame[name] coerced to numbers, with unparseable or missing values set to default"""
+    return pd.to_numeric(filled_column(frame, name, default), errors='coerce').fillna(default)
+
+def prepare_households_for_db(households_df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce the households CSV column-wise into HouseholdRecord fields"""
+    return pd.DataFrame({
+        'household_id': households_df['household_id'].astype(str),
+        'pendapatan_rt': numeric_column(households_df, 'pendapatan_rt', 0.0).astype(float),
+        'kepemilikan_rumah': filled_column(households_df, 'kepemilikan_rumah', True).astype(bool),
+        'akses_listrik': filled_column(households_df, 'akses_listrik', True).astype(bool),
+        'akses_internet': filled_column(households_df, 'akses_internet', False).astype(bool)
+    })
+
+def prepare_adults_for_db(adults_df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce the adults CSV column-wise into AdultRecord fields (repeated ids become categoricals)"""
+    age_column = 'age' if 'age' in adults_df.columns else 'usia'
+    return pd.DataFrame({
+        'person_id': adults_df['person_id'].astype(str).astype('category'),
+        'household_id': adults_df['household_id'].astype(str).astype('category'),
+        'date': pd.to_datetime(adults_df['date'], errors='coerce'),
+        'month': numeric_column(adults_df, 'month', 0).astype(int),
+        'age': numeric_column(adults_df, age_column, 0).astype(int),
+        'sistol': numeric_column(adults_df, 'sistol', 0.0).astype(float),
+        'diastol': numeric_column(adults_df, 'diastol', 0.0).astype(float),
+        'on_treatment': filled_column(adults_df, 'on_treatment', False).astype(bool),
+        'diabetes_koin': filled_column(adults_df, 'diabetes_koin', False).astype(bool),
+        'perokok': filled_column(adults_df, 'perokok', False).astype(bool),
+        'adherence_current': numeric_column(adults_df, 'adherence_current', 1.0).astype(float)
+    })
+
+def prepare_children_for_db(children_df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce the children CSV column-wise into ChildRecord fields (ids become categoricals, missing hemoglobin stays empty)"""
+    return pd.DataFrame({
+        'child_id': children_df['child_id'].astype(str).astype('category'),
+        'household_id': children_df['household_id'].astype(str).astype('category'),
+        'date': pd.to_datetime(children_df['date'], errors='coerce'),
+        'month': numeric_column(children_df, 'month', 0).astype(int),
+        'usia_bulan': numeric_column(children_df, 'usia_bulan', 0).astype(int),
+        'HAZ': numeric_column(children_df, 'HAZ', 0.0).astype(float),
+        'on_program': filled_column(children_df, 'on_program', False).astype(bool),
+        'anemia_hb_gdl': pd.to_numeric(children_df['anemia_hb_gdl'], errors='coerce') if 'anemia_hb_gdl' in children_df.columns else None,
+        'air_bersih': filled_column(children_df, 'air_bersih', True).astype(bool),
+        'jamban_sehat': filled_column(children_df, 'jamban_sehat', True).astype(bool),
+        'haz_change_this_month': numeric_column(children_df, 'haz_change_this_month', 0.0).astype(float)
+    })
+
+def prepare_programs_for_db(programs_df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce the program log CSV column-wise into ProgramRecord fields (repeated names and ids become categoricals)"""
+    return pd.DataFrame({
+        'program': programs_df['program'].astype(str).astype('category'),
+        'target_id': programs_df['target_id'].astype(str).astype('category'),
+        'household_id': filled_column(programs_df, 'household_id', '').astype(str).astype('category'),
+        'tanggal': pd.to_datetime(programs_df['tanggal'], errors='coerce'),
+        'biaya_riil': numeric_column(programs_df, 'biaya_riil', 0.0).astype(float),
+        'status': 'active',
+        'description': filled_column(programs_df, 'description', '').astype(str)
+    })
+
+# Rows handed to each executemany batch by DataFrame.to_sql
+MIGRATION_CHUNK_SIZE = 1000
+
+def drop_existing_rows(db: Session, model, frame: pd.DataFrame, key_columns: List[str]) -> pd.DataFrame:
+    """Drop rows whose key repeats within frame (first one wins) or already exists in the model's table"""
+    frame = frame.drop_duplicates(key_columns)
+    
+    # One query for all existing keys instead of one existence check per row
+    existing = [tuple(row) for row in db.execute(select(*(getattr(model, c) for c in key_columns)))]
+    if existing:
+        keys = pd.MultiIndex.from_frame(frame[key_columns])
+        frame = frame[~keys.isin(existing)]
+    return frame
+
+def append_rows(db: Session, model, frame: pd.DataFrame) -> int:
+    """Append a prepared frame to the model's table without building ORM objects; returns the number of rows"""
+    if frame.empty:
+        return 0
+    
+    # to_sql bypasses the ORM, so the column defaults for the audit timestamps are applied here
+    now = datetime.utcnow()
+    frame = frame.assign(created_at=now, updated_at=now)
+    frame.to_sql(model.__tablename__, db.connection(), if_exists='append', index=False,
+                 chunksize=MIGRATION_CHUNK_SIZE)
+    return len(frame)
@@ -7,8 +7,14 @@ Ensures proper database setup and migrates CSV data to SQLite database
 import sys
 import os
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from db_prep import (
+    prepare_households_for_db, prepare_adults_for_db, prepare_children_for_db, prepare_programs_for_db,
+    drop_existing_rows, append_rows
+)
+
 def ensure_database_directory():
     """Ensure the database directory exists and has proper permissions"""
     db_url = os.getenv("DATABASE_URL", "sqlite:///app/db/digital_twin.db")
@@ -35,6 +41,38 @@ def ensure_database_directory():
     
     return True
 
+# One-shot bulk load: trade durability of the in-flight migration for write throughput
+SQLITE_MIGRATION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-200000",
+    "PRAGMA busy_timeout=60000",  # tables are loaded concurrently; writers queue for the lock
+)
+
+def apply_migration_pragmas(db):
+    """Tune the migration session's SQLite connection for bulk loading (no-op on other databases)"""
+    connection = db.connection()
+    if connection.dialect.name != 'sqlite':
+        return
+    for pragma in SQLITE_MIGRATION_PRAGMAS:
+        connection.exec_driver_sql(pragma)
+
+def migrate_table(session_factory, model, prepare, source, key_columns):
+    """Prepare and insert one CSV frame in its own session and transaction; returns the number of rows inserted"""
+    db = session_factory(autoflush=False)
+    try:
+        apply_migration_pragmas(db)
+        frame = drop_existing_rows(db, model, prepare(source), key_columns)
+        inserted = append_rows(db, model, frame)
+        db.commit()
+        return inserted
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 def main():
     try:
         print('🚀 Starting data migration...')
@@ -47,7 +85,6 @@ def main():
         sys.path.append('/app')
         
         # Import required modules
-        import pandas as pd
         from dashboard_server_fixed import (
             SessionLocal, Base, engine, 
             AdultRecord, ChildRecord, HouseholdRecord, ProgramRecord,
@@ -66,131 +103,62 @@ def main():
         print('🗃️ Creating database tables...')
         Base.metadata.create_all(bind=engine)
         
-        # Get database session
+        # Switch the database to WAL before the per-table workers open their own connections
         db = SessionLocal()
-        
         try:
-            migration_summary = {
-                "households": 0,
-                "adults": 0,
-                "children": 0,
-                "programs": 0
-            }
+            apply_migration_pragmas(db)
+            db.commit()
+        finally:
+            db.close()
+        
+        migration_summary = {
+            "households": 0,
+            "adults": 0,
+            "children": 0,
+            "programs": 0
+        }
+        
+        # The tables are independent, so each is prepared and inserted on its own thread and connection
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {}
             
             # Migrate households
             if 'households' in data_cache and not data_cache['households'].empty:
                 print('🏠 Migrating household data...')
-                household_data = data_cache['households']
-                
-                for _, row in household_data.iterrows():
-                    existing = db.query(HouseholdRecord).filter(
-                        HouseholdRecord.household_id == str(row.get('household_id', ''))
-                    ).first()
-                    
-                    if not existing:
-                        household = HouseholdRecord(
-                            household_id=str(row.get('household_id', '')),
-                            pendapatan_rt=float(row.get('household_income', 0)) if pd.notna(row.get('household_income')) else 0.0,
-                            kepemilikan_rumah=bool(row.get('kepemilikan_rumah', True)),
-                            akses_listrik=bool(row.get('akses_listrik', True)),
-                            akses_internet=bool(row.get('akses_internet', False))
-                        )
-                        db.add(household)
-                        migration_summary["households"] += 1
+                futures["households"] = executor.submit(
+                    migrate_table, SessionLocal, HouseholdRecord, prepare_households_for_db, data_cache['households'], ['household_id']
+                )
             
             # Migrate adults
             if 'adults' in data_cache and not data_cache['adults'].empty:
                 print('👨 Migrating adult data...')
-                adult_data = data_cache['adults']
-                
-                for _, row in adult_data.iterrows():
-                    existing = db.query(AdultRecord).filter(
-                        AdultRecord.person_id == str(row.get('person_id', ''))
-                    ).first()
-                    
-                    if not existing:
-                        adult = AdultRecord(
-                            person_id=str(row.get('person_id', '')),
-                            household_id=str(row.get('household_id', '')),
-                            date=pd.to_datetime(row.get('date')) if pd.notna(row.get('date')) else None,
-                            month=int(row.get('month', 0)) if pd.notna(row.get('month')) else 0,
-                            age=int(row.get('age', 0)) if pd.notna(row.get('age')) else 0,
-                            sistol=float(row.get('sistol', 0)) if pd.notna(row.get('sistol')) else 0.0,
-                            diastol=float(row.get('diastol', 0)) if pd.notna(row.get('diastol')) else 0.0,
-                            on_treatment=bool(row.get('on_treatment', False)),
-                            diabetes_koin=bool(row.get('diabetes_koin', False)),
-                            perokok=bool(row.get('perokok', False))
-                        )
-                        db.add(adult)
-                        migration_summary["adults"] += 1
+                futures["adults"] = executor.submit(
+                    migrate_table, SessionLocal, AdultRecord, prepare_adults_for_db, data_cache['adults'], ['person_id', 'date']
+                )
             
             # Migrate children
             if 'children' in data_cache and not data_cache['children'].empty:
                 print('👶 Migrating children data...')
-                child_data = data_cache['children']
-                
-                for _, row in child_data.iterrows():
-                    existing = db.query(ChildRecord).filter(
-                        ChildRecord.person_id == str(row.get('person_id', ''))
-                    ).first()
-                    
-                    if not existing:
-                        child = ChildRecord(
-                            person_id=str(row.get('person_id', '')),
-                            household_id=str(row.get('household_id', '')),
-                            date=pd.to_datetime(row.get('date')) if pd.notna(row.get('date')) else None,
-                            month=int(row.get('month', 0)) if pd.notna(row.get('month')) else 0,
-                            age_months=int(row.get('age_months', 0)) if pd.notna(row.get('age_months')) else 0,
-                            height_cm=float(row.get('height_cm', 0)) if pd.notna(row.get('height_cm')) else 0.0,
-                            weight_kg=float(row.get('weight_kg', 0)) if pd.notna(row.get('weight_kg')) else 0.0,
-                            z_score=float(row.get('z_score', 0)) if pd.notna(row.get('z_score')) else 0.0,
-                            stunted=bool(row.get('stunted', False)),
-                            intervention_status=str(row.get('intervention_status', ''))
-                        )
-                        db.add(child)
-                        migration_summary["children"] += 1
+                futures["children"] = executor.submit(
+                    migrate_table, SessionLocal, ChildRecord, prepare_children_for_db, data_cache['children'], ['child_id', 'date']
+                )
             
             # Migrate programs
             if 'program_log' in data_cache and not data_cache['program_log'].empty:
                 print('📋 Migrating program data...')
-                program_data = data_cache['program_log']
-                
-                for _, row in program_data.iterrows():
-                    existing = db.query(ProgramRecord).filter(
-                        ProgramRecord.person_id == str(row.get('person_id', '')),
-                        ProgramRecord.program_type == str(row.get('program_type', ''))
-                    ).first()
-                    
-                    if not existing:
-                        program = ProgramRecord(
-                            person_id=str(row.get('person_id', '')),
-                            household_id=str(row.get('household_id', '')),
-                            program_type=str(row.get('program_type', '')),
-                            date=pd.to_datetime(row.get('date')) if pd.notna(row.get('date')) else None,
-                            month=int(row.get('month', 0)) if pd.notna(row.get('month')) else 0,
-                            outcome_before=float(row.get('outcome_before', 0)) if pd.notna(row.get('outcome_before')) else 0.0,
-                            outcome_after=float(row.get('outcome_after', 0)) if pd.notna(row.get('outcome_after')) else 0.0,
-                            improvement=float(row.get('improvement', 0)) if pd.notna(row.get('improvement')) else 0.0,
-                            cost=float(row.get('cost', 0)) if pd.notna(row.get('cost')) else 0.0
-                        )
-                        db.add(program)
-                        migration_summary["programs"] += 1
-            
-            # Commit the transaction
-            db.commit()
+                futures["programs"] = executor.submit(
+                    migrate_table, SessionLocal, ProgramRecord, prepare_programs_for_db, data_cache['program_log'], ['program', 'target_id', 'tanggal']
+                )
             
-            print(f'📊 Migration Summary:')
-            print(f'   🏠 Households: {migration_summary["households"]}')
-            print(f'   👨 Adults: {migration_summary["adults"]}')
-            print(f'   👶 Children: {migration_summary["children"]}')
-            print(f'   📋 Programs: {migration_summary["programs"]}')
-            print(f'   📈 Total: {sum(migration_summary.values())} records')
-            
-        except Exception as e:
-            db.rollback()
-            raise e
-        finally:
-            db.close()
+            for table, future in futures.items():
+                migration_summary[table] = future.result()
+        
+        print(f'📊 Migration Summary:')
+        print(f'   🏠 Households: {migration_summary["households"]}')
+        print(f'   👨 Adults: {migration_summary["adults"]}')
+        print(f'   👶 Children: {migration_summary["children"]}')
+        print(f'   📋 Programs: {migration_summary["programs"]}')
+        print(f'   📈 Total: {sum(migration_summary.values())} records')
         
         print('✅ Data migration completed successfully')
         return 0
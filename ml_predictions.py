@@ -14,13 +14,304 @@ Fitur:
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
-from scipy import stats
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
+from pandas.api.types import is_numeric_dtype
+from typing import Dict, List, NamedTuple, Optional, Tuple, Any
+from functools import lru_cache
+import math
 import warnings
-warnings.filterwarnings('ignore')
+
+def prepare_longitudinal(data: pd.DataFrame, id_column: str = 'person_id') -> pd.DataFrame:
+    """
+    Siapkan data longitudinal sekali saat dimuat untuk semua prediksi
+
+    Mengurutkan baris per orang secara kronologis dan menambahkan kolom
+    '_days' (int64, hari sejak epoch), sehingga prediktor tidak perlu lagi
+    mengurutkan dan mengurai tanggal pada setiap panggilan. Prediktor
+    menyiapkan sendiri frame mentah (lihat _ensure_prepared), tetapi frame
+    yang sudah disiapkan menghindari kerja itu pada setiap panggilan.
+    """
+    sort_columns = [id_column, 'date'] if id_column in data.columns else ['date']
+    data = data.sort_values(sort_columns, kind='stable')
+    days = pd.to_datetime(data['date']).to_numpy(dtype='datetime64[D]').astype(np.int64)
+    return data.assign(_days=days)
+
+def _ensure_prepared(data: pd.DataFrame, id_column: str) -> pd.DataFrame:
+    """Frame as returned by prepare_longitudinal, preparing raw frames on the fly (frames without dates pass through)"""
+    if '_days' in data.columns or 'date' not in data.columns:
+        return data
+    return prepare_longitudinal(data, id_column)
+
+class TrendFit(NamedTuple):
+    """Least-squares line fit with the fields of scipy's LinregressResult used by the predictor"""
+    slope: float
+    intercept: float
+    rvalue: float
+    stderr: float
+
+class PreparedBP(NamedTuple):
+    """One person's BP records reduced to what predict_bp_progression needs, independent of months_ahead"""
+    systolic: np.ndarray
+    diastolic: np.ndarray
+    latest: Dict[str, Any]
+    features: Dict[str, Any]
+    systolic_trend: TrendFit
+    diastolic_trend: TrendFit
+    data_points: int  # records with both readings
+
+class PreparedHAZ(NamedTuple):
+    """One child's HAZ records reduced to what predict_haz_progression needs, independent of months_ahead"""
+    haz: np.ndarray
+    latest: Dict[str, Any]
+    features: Dict[str, Any]
+    haz_trend: TrendFit
+    data_points: int  # records with a HAZ reading
+
+# Series length from which _fast_linregress solves with np.linalg.lstsq instead of the centred sums
+LSTSQ_MIN_POINTS = 1000
+
+# Upper bound on cached per-person preparations (see HealthOutcomePredictor._get_prepared)
+PREPARED_CACHE_SIZE = 1024
+
+def grouped_linregress(groups: pd.Series, x: pd.Series, y: pd.Series) -> pd.DataFrame:
+    """
+    Regresi linier y terhadap x untuk setiap grup sekaligus
+
+    Menghitung slope, intercept, rvalue dan stderr (semantik sama dengan
+    scipy.stats.linregress) dari jumlah kuadrat terpusat per grup, sehingga
+    satu kohort cukup dengan beberapa reduksi groupby, bukan satu panggilan
+    linregress per orang. Hanya pasangan (x, y) yang lengkap yang dihitung,
+    termasuk untuk n. Grup dengan semua x identik atau tanpa pasangan lengkap
+    mendapat slope NaN, grup dengan y konstan mendapat rvalue NaN (seperti
+    linregress).
+    """
+    x = x.astype(float)
+    y = y.astype(float)
+    all_groups = pd.Index(groups.unique(), name=groups.name)
+    paired = x.notna() & y.notna()
+    groups, x, y = groups[paired], x[paired], y[paired]
+    by_x, by_y = x.groupby(groups, sort=False), y.groupby(groups, sort=False)
+    dx = x - by_x.transform('mean')
+    dy = y - by_y.transform('mean')
+    
+    sums = pd.DataFrame({'sxx': dx * dx, 'sxy': dx * dy, 'syy': dy * dy}).groupby(groups, sort=False).sum()
+    n = by_x.size()
+    sxx, sxy, syy = sums['sxx'], sums['sxy'], sums['syy']
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (sxy / sxx).where(sxx != 0)
+        rvalue = (sxy / np.sqrt(sxx * syy)).clip(-1.0, 1.0)
+        stderr = np.sqrt((1 - rvalue ** 2) * syy / sxx / (n - 2)).where(n > 2, 0.0)
+    
+    fits = pd.DataFrame({
+        'n': n,
+        'slope': slope,
+        'intercept': by_y.mean() - slope * by_x.mean(),
+        'rvalue': rvalue,
+        'stderr': stderr
+    })
+    # Groups without a single complete pair still get a (NaN) row
+    fits = fits.reindex(all_groups)
+    fits['n'] = fits['n'].fillna(0).astype(np.int64)
+    return fits
+
+def _bp_adjust(systolic, diastolic, age, on_treatment, adherence, treatment_months,
+               diabetes, smoking, months) -> Tuple[float, float]:
+    """Clinically adjusted (systolic, diastolic) from primitive scalars, without dict lookups"""
+    
+    # Age effect (BP tends to increase with age)
+    age_adjustment = (age - 50) * 0.2 * months
+    
+    # Treatment effect
+    treatment_effect = 0
+    if on_treatment and adherence > 0:
+        # Treatment reduces BP over time
+        treatment_effect = -15 * adherence * min(1, treatment_months / 6)
+    
+    # Lifestyle factors
+    diabetes_effect = 3 * diabetes * months
+    smoking_effect = 2 * smoking * months
+    
+    # Apply adjustments
+    adjusted_systolic = systolic + age_adjustment + treatment_effect + diabetes_effect + smoking_effect
+    adjusted_diastolic = diastolic + (age_adjustment * 0.6) + (treatment_effect * 0.7) + (diabetes_effect * 0.6)
+    
+    # Physiological bounds
+    return max(90, min(250, adjusted_systolic)), max(60, min(130, adjusted_diastolic))
+
+def _haz_adjust(haz, age_months, on_program, program_months, clean_water, sanitation,
+                complementary_feeding, hemoglobin, months) -> float:
+    """Growth-adjusted HAZ from primitive scalars, without dict lookups"""
+    
+    # Age-specific growth potential (younger children have more catch-up potential)
+    age_factor = max(0.1, 1 - (age_months / 60))  # Decreases with age
+    
+    # Program effect
+    program_effect = 0
+    if on_program:
+        # Nutrition programs can improve HAZ, especially early intervention
+        program_intensity = min(1, program_months / 12)
+        program_effect = 0.3 * program_intensity * age_factor * months / 6
+    
+    # Environmental factors
+    water_sanitation_effect = 0.1 * (clean_water + sanitation) * months / 6
+    nutrition_effect = 0.15 * complementary_feeding * months / 6
+    
+    # Anemia effect (low Hb associated with poor growth)
+    hb_effect = 0.1 * max(0, (hemoglobin - 11) / 4) * months / 6
+    
+    # Apply adjustments, within natural bounds for HAZ
+    adjusted_haz = haz + program_effect + water_sanitation_effect + nutrition_effect + hb_effect
+    return max(-5, min(3, adjusted_haz))
+
+# Population risk levels, indexed by the level codes of the vectorized assessments below
+BP_RISK_LEVELS = np.array(['low', 'moderate', 'high', 'very_high'], dtype=object)
+BP_RISK_BASE_SCORES = np.array([0.2, 0.5, 0.7, 0.9])
+STUNTING_RISK_LEVELS = np.array(['low', 'medium', 'high'], dtype=object)
+
+# Growth buckets: a value's bucket is the number of thresholds it strictly exceeds
+GROWTH_VELOCITY_THRESHOLDS = np.array([-0.1, 0.0, 0.1])
+GROWTH_PATTERNS = np.array(['poor_growth', 'growth_faltering', 'normal_growth', 'catch_up_growth'], dtype=object)
+CATCH_UP_AGE_THRESHOLDS = np.array([24, 36])  # months; age buckets are <24, <36 and older
+CATCH_UP_HAZ_THRESHOLDS = np.array([-4, -3, -2.5])
+CATCH_UP_POTENTIALS = np.array([
+    ['low', 'moderate', 'high', 'high'],    # younger than 24 months
+    ['low', 'low', 'low', 'moderate'],      # 24-35 months
+    ['low', 'low', 'low', 'low']            # 36 months and older
+], dtype=object)
+
+@lru_cache(maxsize=4096)
+def _bp_category(systolic: int, diastolic: int) -> str:
+    """WHO/JNC category ladder, memoized on whole-mmHg readings by HealthOutcomePredictor._get_bp_category"""
+    
+    if systolic >= 180 or diastolic >= 110:
+        return 'Hipertensi Tahap 3 (Parah)'
+    elif systolic >= 160 or diastolic >= 100:
+        return 'Hipertensi Tahap 2'
+    elif systolic >= 140 or diastolic >= 90:
+        return 'Hipertensi Tahap 1'
+    elif systolic >= 130 or diastolic >= 85:
+        return 'Tinggi Normal'
+    elif systolic >= 120 or diastolic >= 80:
+        return 'Normal'
+    else:
+        return 'Optimal'
+
+def _array_module(use_gpu: bool):
+    """CuPy when a GPU run is requested and CuPy is installed, otherwise NumPy"""
+    if use_gpu:
+        try:
+            import cupy
+            return cupy
+        except ImportError:
+            pass
+    return np
+
+def _assess_bp_risk_vec(systolic: np.ndarray, diastolic: np.ndarray, diabetes: np.ndarray,
+                        smoking: np.ndarray, age: np.ndarray, xp=np) -> Dict[str, np.ndarray]:
+    """
+    Array form of HealthOutcomePredictor._assess_bp_risk: level codes, level names and risk scores
+
+    With xp=cupy the comparisons run on the GPU over float32 copies of the
+    inputs; the results are always returned as NumPy arrays.
+    """
+    if xp is not np:
+        systolic, diastolic, diabetes, smoking, age = (
+            xp.asarray(column, dtype=xp.float32) for column in (systolic, diastolic, diabetes, smoking, age)
+        )
+    
+    level_code = xp.select(
+        [(systolic >= 180) | (diastolic >= 110), (systolic >= 160) | (diastolic >= 100), (systolic >= 140) | (diastolic >= 90)],
+        [3, 2, 1],
+        default=0
+    )
+    
+    # Additional risk factors are added in the same order as the scalar version
+    risk_score = xp.asarray(BP_RISK_BASE_SCORES)[level_code] + xp.where(diabetes, 0.2, 0) + xp.where(smoking, 0.15, 0) + xp.where(age > 65, 0.1, 0)
+    risk_score = xp.minimum(1, risk_score)
+    
+    if xp is not np:
+        level_code, risk_score = xp.asnumpy(level_code), xp.asnumpy(risk_score)
+    
+    return {
+        'level_code': level_code,
+        'risk_level': BP_RISK_LEVELS[level_code],
+        'risk_score': risk_score
+    }
+
+def _classify_growth_pattern_vec(velocity: np.ndarray) -> np.ndarray:
+    """Array form of HealthOutcomePredictor._classify_growth_pattern (NaN velocity is 'poor_growth')"""
+    bucket = np.searchsorted(GROWTH_VELOCITY_THRESHOLDS, velocity, side='left')
+    return GROWTH_PATTERNS[np.where(np.isnan(velocity), 0, bucket)]
+
+def _assess_catch_up_potential_vec(age_months: np.ndarray, baseline_haz: np.ndarray) -> np.ndarray:
+    """Array form of HealthOutcomePredictor._assess_catch_up_potential"""
+    # NaN ages sort past every threshold, into the oldest bucket, like the scalar ladder
+    age_bucket = np.searchsorted(CATCH_UP_AGE_THRESHOLDS, age_months, side='right')
+    haz_bucket = np.searchsorted(CATCH_UP_HAZ_THRESHOLDS, baseline_haz, side='left')
+    return CATCH_UP_POTENTIALS[age_bucket, np.where(np.isnan(baseline_haz), 0, haz_bucket)]
+
+# Population scoring only compares against coarse clinical thresholds (whole mmHg, tenths of HAZ),
+# so its columns are read as float32 to halve the bytes moved per pass
+RISK_DTYPE = np.float32
+
+def _column_array(data: pd.DataFrame, column: str, default, dtype=RISK_DTYPE) -> np.ndarray:
+    """Float array of a column, or a constant array when the column is missing"""
+    if column in data.columns:
+        return data[column].to_numpy(dtype=dtype)
+    return np.full(len(data), default, dtype=dtype)
+
+def _sample_nanstd(values: np.ndarray) -> float:
+    """Sample standard deviation ignoring NaN; NaN without a warning when fewer than two readings remain"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanstd(values, ddof=1)
+
+def _level_distribution(level_code: np.ndarray, levels: np.ndarray) -> Dict[str, int]:
+    """Number of rows per risk level, in level order"""
+    counts = np.bincount(level_code, minlength=len(levels))
+    return {level: int(count) for level, count in zip(levels, counts)}
+
+def _percentage(count: int, total: int) -> float:
+    """Share of total as a percentage with one decimal (0 for an empty population)"""
+    return round(100 * count / total, 1) if total else 0.0
+
+# Condition bits for the BP recommendation masks
+BP_REC_URGENT = 1 << 0            # predicted systolic >= 160
+BP_REC_ELEVATED = 1 << 1          # predicted systolic >= 140
+BP_REC_UNTREATED = 1 << 2         # not on treatment
+BP_REC_SMOKING = 1 << 3
+BP_REC_DIABETES = 1 << 4
+BP_REC_LOW_ADHERENCE = 1 << 5     # adherence < 0.8
+
+# Condition bits for the HAZ recommendation masks
+HAZ_REC_SEVERE = 1 << 0           # predicted HAZ < -3
+HAZ_REC_STUNTED = 1 << 1          # predicted HAZ < -2
+HAZ_REC_FIRST_1000_DAYS = 1 << 2  # younger than 24 months
+HAZ_REC_NO_EXCLUSIVE_BF = 1 << 3  # younger than 6 months without exclusive breastfeeding
+HAZ_REC_POOR_FEEDING = 1 << 4     # 6 months or older without adequate complementary feeding
+HAZ_REC_ANEMIA = 1 << 5           # hemoglobin < 11
+HAZ_REC_POOR_WASH = 1 << 6        # no clean water or no sanitation
+HAZ_REC_NO_PROGRAM = 1 << 7
+
+# Recommendation phrases, shared by every recommendation list instead of rebuilt per call
+BP_URGENT_RECOMMENDATIONS = ('Segera konsultasi medis diperlukan', 'Pertimbangkan rawat inap jika bergejala')
+BP_ELEVATED_RECOMMENDATIONS = ('Tingkatkan pengobatan antihipertensi', 'Pantau tekanan darah setiap minggu')
+BP_START_TREATMENT_RECOMMENDATIONS = ('Mulai pengobatan antihipertensi',)
+BP_SMOKING_RECOMMENDATIONS = ('Konseling berhenti merokok - prioritas tinggi',)
+BP_DIABETES_RECOMMENDATIONS = ('Optimalkan manajemen diabetes', 'Target tekanan darah <130/80 mmHg')
+BP_ADHERENCE_RECOMMENDATIONS = ('Tingkatkan kepatuhan pengobatan melalui edukasi',)
+BP_LIFESTYLE_RECOMMENDATIONS = ('Aktivitas fisik teratur dan modifikasi pola makan',)
+BP_HEURISTIC_RECOMMENDATIONS = ('Disarankan pemantauan rutin', 'Pertimbangkan perubahan gaya hidup')
+
+HAZ_SEVERE_RECOMMENDATIONS = ('Intervensi gizi mendesak diperlukan', 'Pertimbangkan program pemberian makan terapeutik')
+HAZ_STUNTED_RECOMMENDATIONS = ('Diperlukan dukungan gizi intensif', 'Pantau pertumbuhan setiap bulan')
+HAZ_FIRST_1000_DAYS_RECOMMENDATIONS = ('Fokus pada 1000 hari pertama - periode kritis',)
+HAZ_EXCLUSIVE_BF_RECOMMENDATIONS = ('Promosikan pemberian ASI eksklusif',)
+HAZ_FEEDING_RECOMMENDATIONS = ('Perbaiki praktik pemberian makanan pendamping ASI',)
+HAZ_ANEMIA_RECOMMENDATIONS = ('Atasi anemia dengan suplementasi zat besi',)
+HAZ_WASH_RECOMMENDATIONS = ('Perbaiki kondisi WASH untuk mencegah infeksi',)
+HAZ_PROGRAM_RECOMMENDATIONS = ('Daftarkan pada program dukungan gizi',)
+HAZ_HEURISTIC_RECOMMENDATIONS = ('Pantau pertumbuhan secara rutin', 'Pastikan asupan gizi memadai')
 
 class HealthOutcomePredictor:
     """
@@ -29,9 +320,11 @@ class HealthOutcomePredictor:
     """
     
     def __init__(self):
-        self.scaler = StandardScaler()
-        self.bp_model = None
-        self.haz_model = None
+        # Condition bitmask -> recommendation tuple, shared by every person with the same conditions
+        self._bp_recommendation_cache = {}
+        self._haz_recommendation_cache = {}
+        # (kind, id, record count, last record day, measurements) -> prepared per-person records, oldest evicted first
+        self._prepared_cache = {}
         
     def predict_bp_progression(self, person_data: pd.DataFrame, months_ahead: int = 6) -> Dict[str, Any]:
         """
@@ -40,74 +333,134 @@ class HealthOutcomePredictor:
         Menggunakan analisis tren dan pengetahuan klinis tanpa memerlukan model
         yang sudah dilatih.
         """
-        try:
-            # Sort by date to get progression
-            person_data = person_data.sort_values('date')
-            
-            if len(person_data) < 2:
-                # Not enough data for trend analysis, use clinical heuristics
-                latest = person_data.iloc[-1]
-                return self._predict_bp_heuristic(latest, months_ahead)
-            
-            # Extract features
-            features = self._extract_bp_features(person_data)
-            latest = person_data.iloc[-1]
-            
-            # Calculate trend
-            dates = pd.to_datetime(person_data['date'])
-            days_since_start = (dates - dates.min()).dt.days
-            
-            # Linear regression for trend
-            systolic_trend = stats.linregress(days_since_start, person_data['sistol'])
-            diastolic_trend = stats.linregress(days_since_start, person_data['diastol'])
-            
-            # Predict future BP
-            days_future = months_ahead * 30
-            predicted_systolic = latest['sistol'] + (systolic_trend.slope * days_future)
-            predicted_diastolic = latest['diastol'] + (diastolic_trend.slope * days_future)
-            
-            # Apply clinical adjustments
-            prediction = self._apply_clinical_adjustments(
-                predicted_systolic, predicted_diastolic, features, months_ahead
-            )
-            
-            # Calculate confidence based on trend consistency
-            confidence = self._calculate_bp_confidence(person_data, systolic_trend, diastolic_trend)
-            
-            return {
-                'person_id': latest['person_id'],
-                'current_bp': {
-                    'systolic': float(latest['sistol']),
-                    'diastolic': float(latest['diastol'])
-                },
-                'predicted_bp': {
-                    'systolic': round(prediction['systolic'], 1),
-                    'diastolic': round(prediction['diastolic'], 1)
-                },
-                'trend_analysis': {
-                    'systolic_trend_per_month': round(systolic_trend.slope * 30, 2),
-                    'diastolic_trend_per_month': round(diastolic_trend.slope * 30, 2),
-                    'trend_confidence': round(confidence, 3)
-                },
-                'risk_assessment': self._assess_bp_risk(prediction, features),
-                'confidence_interval': {
-                    'systolic': [
-                        round(prediction['systolic'] - (10 * (1 - confidence)), 1),
-                        round(prediction['systolic'] + (10 * (1 - confidence)), 1)
-                    ],
-                    'diastolic': [
-                        round(prediction['diastolic'] - (7 * (1 - confidence)), 1),
-                        round(prediction['diastolic'] + (7 * (1 - confidence)), 1)
-                    ]
-                },
-                'recommendations': self._generate_bp_recommendations(prediction, features)
-            }
-            
-        except Exception as e:
-            print(f"Kesalahan memprediksi perkembangan tekanan darah: {e}")
-            # Fallback to heuristic prediction
-            latest = person_data.iloc[-1]
-            return self._predict_bp_heuristic(latest, months_ahead)
+        person_data = _ensure_prepared(person_data, 'person_id')
+        if self._validate_bp_input(person_data) is not None:
+            # Not enough usable data for trend analysis, use clinical heuristics
+            return self._predict_bp_heuristic(person_data.iloc[-1], months_ahead)
+        
+        # Arrays, features and trends only depend on the records, so repeat calls reuse them
+        systolic, diastolic, latest, features, systolic_trend, diastolic_trend, data_points = self._get_prepared(
+            'bp', person_data, 'person_id', ('sistol', 'diastol'), self._prepare_bp
+        )
+        
+        # Predict future BP
+        days_future = months_ahead * 30
+        predicted_systolic = systolic[-1] + (systolic_trend.slope * days_future)
+        predicted_diastolic = diastolic[-1] + (diastolic_trend.slope * days_future)
+        
+        # Apply clinical adjustments
+        prediction = self._apply_clinical_adjustments(
+            predicted_systolic, predicted_diastolic, features, months_ahead
+        )
+        
+        # Calculate confidence based on trend consistency
+        confidence = self._calculate_bp_confidence(
+            data_points, systolic_trend.stderr, diastolic_trend.stderr,
+            systolic_trend.rvalue, diastolic_trend.rvalue
+        )
+        
+        return {
+            'person_id': latest['person_id'],
+            'current_bp': {
+                'systolic': float(latest['sistol']),
+                'diastolic': float(latest['diastol'])
+            },
+            'predicted_bp': {
+                'systolic': round(prediction['systolic'], 1),
+                'diastolic': round(prediction['diastolic'], 1)
+            },
+            'trend_analysis': {
+                'systolic_trend_per_month': round(systolic_trend.slope * 30, 2),
+                'diastolic_trend_per_month': round(diastolic_trend.slope * 30, 2),
+                'trend_confidence': round(confidence, 3)
+            },
+            'risk_assessment': self._assess_bp_risk(prediction, features),
+            'confidence_interval': {
+                'systolic': [
+                    round(prediction['systolic'] - (10 * (1 - confidence)), 1),
+                    round(prediction['systolic'] + (10 * (1 - confidence)), 1)
+                ],
+                'diastolic': [
+                    round(prediction['diastolic'] - (7 * (1 - confidence)), 1),
+                    round(prediction['diastolic'] + (7 * (1 - confidence)), 1)
+                ]
+            },
+            'recommendations': self._generate_bp_recommendations(prediction, features)
+        }
+    
+    def predict_bp_progression_many(self, adults_data: pd.DataFrame, months_ahead: int = 6) -> List[Dict[str, Any]]:
+        """
+        Prediksi tekanan darah untuk seluruh kohort dalam satu proses array
+
+        Tren, penyesuaian klinis, risiko, keyakinan dan rekomendasi dihitung
+        sebagai operasi NumPy per orang, sama dengan predict_bp_progression
+        (hingga pembulatan floating point). Orang tanpa tren yang dapat dihitung
+        (kurang dari dua tanggal berbeda) memakai heuristik, dengan
+        method 'heuristic' dan confidence None. Bacaan yang kosong dilewati,
+        baik di sini maupun di predict_bp_progression.
+        """
+        adults_data = _ensure_prepared(adults_data, 'person_id')
+        trends = self.fit_bp_trends(adults_data)
+        latest = adults_data.groupby('person_id', sort=False).tail(1).set_index('person_id').loc[trends.index]
+        
+        systolic = latest['sistol'].to_numpy(dtype=np.float64)
+        diastolic = latest['diastol'].to_numpy(dtype=np.float64)
+        age = _column_array(latest, 'age' if 'age' in latest.columns else 'usia', 50, np.float64)
+        on_treatment = _column_array(latest, 'on_treatment', 0, np.float64)
+        treatment_months = _column_array(latest, 'treatment_months', 0, np.float64)
+        adherence = _column_array(latest, 'adherence_current', 0, np.float64)
+        diabetes = _column_array(latest, 'diabetes_koin', 0, np.float64)
+        smoking = _column_array(latest, 'perokok', 0, np.float64)
+        
+        # Trend extrapolation, and the heuristic where no trend could be fitted
+        has_trend = trends['systolic_slope'].notna().to_numpy() & trends['diastolic_slope'].notna().to_numpy()
+        days_future = months_ahead * 30
+        treated = on_treatment != 0
+        predicted_systolic = np.where(
+            has_trend,
+            systolic + trends['systolic_slope'].to_numpy() * days_future,
+            np.where(treated, systolic - 2, systolic + (months_ahead * 0.5))
+        )
+        predicted_diastolic = np.where(
+            has_trend,
+            diastolic + trends['diastolic_slope'].to_numpy() * days_future,
+            np.where(treated, diastolic - 1, diastolic + (months_ahead * 0.3))
+        )
+        
+        # Clinical adjustments (array form of _bp_adjust)
+        age_adjustment = (age - 50) * 0.2 * months_ahead
+        treatment_effect = np.where(treated & (adherence > 0), -15 * adherence * np.fmin(1, treatment_months / 6), 0)
+        diabetes_effect = 3 * diabetes * months_ahead
+        smoking_effect = 2 * smoking * months_ahead
+        adjusted_systolic = predicted_systolic + age_adjustment + treatment_effect + diabetes_effect + smoking_effect
+        adjusted_diastolic = predicted_diastolic + (age_adjustment * 0.6) + (treatment_effect * 0.7) + (diabetes_effect * 0.6)
+        adjusted_systolic = np.where(has_trend, np.fmax(90, np.fmin(250, adjusted_systolic)), predicted_systolic)
+        adjusted_diastolic = np.where(has_trend, np.fmax(60, np.fmin(130, adjusted_diastolic)), predicted_diastolic)
+        
+        # Confidence (array form of _calculate_bp_confidence)
+        data_confidence = np.minimum(1, trends['n'].to_numpy() / 10)
+        trend_confidence = 1 / (1 + np.abs(trends['systolic_stderr'].to_numpy()) + np.abs(trends['diastolic_stderr'].to_numpy()))
+        r_squared_confidence = (trends['systolic_rvalue'].to_numpy() ** 2 + trends['diastolic_rvalue'].to_numpy() ** 2) / 2
+        overall_confidence = (data_confidence * 0.3 + trend_confidence * 0.3 + r_squared_confidence * 0.4)
+        confidence = np.fmin(1, np.fmax(0.1, overall_confidence))
+        
+        risk = _assess_bp_risk_vec(adjusted_systolic, adjusted_diastolic, diabetes, smoking, age)
+        masks = self._bp_recommendation_masks(adjusted_systolic, on_treatment, smoking, diabetes, adherence)
+        
+        results = pd.DataFrame({
+            'person_id': trends.index,
+            'sys_pred': np.round(adjusted_systolic, 1),
+            'dia_pred': np.round(adjusted_diastolic, 1),
+            'risk_level': risk['risk_level'],
+            'risk_score': np.round(risk['risk_score'], 3),
+            'confidence': np.where(has_trend, np.round(confidence, 3).astype(object), None),
+            'method': np.where(has_trend, 'trend', 'heuristic'),
+            'recommendations': [
+                list(self._bp_recommendations_for_mask(int(mask))) if trend else list(BP_HEURISTIC_RECOMMENDATIONS)
+                for mask, trend in zip(masks, has_trend)
+            ]
+        })
+        return results.to_dict(orient='records')
     
     def predict_haz_progression(self, child_data: pd.DataFrame, months_ahead: int = 6) -> Dict[str, Any]:
         """
@@ -115,74 +468,133 @@ class HealthOutcomePredictor:
 
         Menggunakan analisis kecepatan pertumbuhan dan standar pertumbuhan WHO
         """
-        try:
-            child_data = child_data.sort_values('date')
-            
-            if len(child_data) < 2:
-                latest = child_data.iloc[-1]
-                return self._predict_haz_heuristic(latest, months_ahead)
-            
-            # Extract features
-            features = self._extract_haz_features(child_data)
-            latest = child_data.iloc[-1]
-            
-            # Calculate growth velocity
-            dates = pd.to_datetime(child_data['date'])
-            months_since_start = (dates - dates.min()).dt.days / 30
-            
-            # HAZ trend analysis
-            haz_trend = stats.linregress(months_since_start, child_data['HAZ'])
-            
-            # Predict future HAZ
-            predicted_haz = latest['HAZ'] + (haz_trend.slope * months_ahead)
-            
-            # Apply growth adjustments based on age and interventions
-            prediction = self._apply_growth_adjustments(predicted_haz, features, months_ahead)
-            
-            # Calculate confidence
-            confidence = self._calculate_haz_confidence(child_data, haz_trend)
-            
-            return {
-                'child_id': latest['child_id'],
-                'current_status': {
-                    'haz': float(latest['HAZ']),
-                    'age_months': int(latest['usia_bulan']),
-                    'stunting_status': 'stunted' if latest['HAZ'] < -2 else 'normal'
-                },
-                'predicted_status': {
-                    'haz': round(prediction['haz'], 2),
-                    'age_months': int(latest['usia_bulan'] + months_ahead),
-                    'stunting_risk': 'high' if prediction['haz'] < -2 else 'medium' if prediction['haz'] < -1 else 'low'
-                },
-                'growth_analysis': {
-                    'velocity_per_month': round(haz_trend.slope, 3),
-                    'growth_pattern': self._classify_growth_pattern(haz_trend.slope),
-                    'catch_up_potential': self._assess_catch_up_potential(features)
-                },
-                'confidence_interval': {
-                    'haz_range': [
-                        round(prediction['haz'] - (0.5 * (1 - confidence)), 2),
-                        round(prediction['haz'] + (0.5 * (1 - confidence)), 2)
-                    ],
-                    'confidence_score': round(confidence, 3)
-                },
-                'recommendations': self._generate_haz_recommendations(prediction, features)
-            }
-            
-        except Exception as e:
-            print(f"Kesalahan memprediksi perkembangan HAZ: {e}")
-            latest = child_data.iloc[-1]
-            return self._predict_haz_heuristic(latest, months_ahead)
+        child_data = _ensure_prepared(child_data, 'child_id')
+        if self._validate_haz_input(child_data) is not None:
+            return self._predict_haz_heuristic(child_data.iloc[-1], months_ahead)
+        
+        # Arrays, features and trend only depend on the records, so repeat calls reuse them
+        haz, latest, features, haz_trend, data_points = self._get_prepared('haz', child_data, 'child_id', ('HAZ',), self._prepare_haz)
+        
+        # Predict future HAZ
+        predicted_haz = haz[-1] + (haz_trend.slope * months_ahead)
+        
+        # Apply growth adjustments based on age and interventions
+        prediction = self._apply_growth_adjustments(predicted_haz, features, months_ahead)
+        
+        # Calculate confidence
+        confidence = self._calculate_haz_confidence(data_points, haz_trend.stderr, haz_trend.rvalue)
+        
+        return {
+            'child_id': latest['child_id'],
+            'current_status': {
+                'haz': float(latest['HAZ']),
+                'age_months': int(latest['usia_bulan']),
+                'stunting_status': 'stunted' if latest['HAZ'] < -2 else 'normal'
+            },
+            'predicted_status': {
+                'haz': round(prediction['haz'], 2),
+                'age_months': int(latest['usia_bulan'] + months_ahead),
+                'stunting_risk': 'high' if prediction['haz'] < -2 else 'medium' if prediction['haz'] < -1 else 'low'
+            },
+            'growth_analysis': {
+                'velocity_per_month': round(haz_trend.slope, 3),
+                'growth_pattern': self._classify_growth_pattern(haz_trend.slope),
+                'catch_up_potential': self._assess_catch_up_potential(features)
+            },
+            'confidence_interval': {
+                'haz_range': [
+                    round(prediction['haz'] - (0.5 * (1 - confidence)), 2),
+                    round(prediction['haz'] + (0.5 * (1 - confidence)), 2)
+                ],
+                'confidence_score': round(confidence, 3)
+            },
+            'recommendations': self._generate_haz_recommendations(prediction, features)
+        }
+    
+    def predict_haz_progression_many(self, children_data: pd.DataFrame, months_ahead: int = 6) -> List[Dict[str, Any]]:
+        """
+        Prediksi HAZ untuk seluruh kohort anak dalam satu proses array
+
+        Tren, penyesuaian pertumbuhan, risiko stunting, pola pertumbuhan,
+        potensi kejar tumbuh, keyakinan dan rekomendasi dihitung sebagai
+        operasi NumPy per anak, sama dengan predict_haz_progression (hingga
+        pembulatan floating point). Anak tanpa tren yang dapat dihitung memakai
+        heuristik, dengan method 'heuristic' dan nilai tren None.
+        """
+        children_data = _ensure_prepared(children_data, 'child_id')
+        trends = self.fit_haz_trends(children_data)
+        by_child = children_data.groupby('child_id', sort=False)
+        latest = by_child.tail(1).set_index('child_id').loc[trends.index]
+        baseline_haz = by_child['HAZ'].first().loc[trends.index].to_numpy(dtype=np.float64)
+        
+        haz = latest['HAZ'].to_numpy(dtype=np.float64)
+        age_months = _column_array(latest, 'usia_bulan', 24, np.float64)
+        on_program = _column_array(latest, 'on_program', 0, np.float64)
+        program_months = _column_array(latest, 'program_months', 0, np.float64)
+        hemoglobin = _column_array(latest, 'anemia_hb_gdl', 12, np.float64)
+        exclusive_bf = _column_array(latest, 'ASI_eksklusif', 0, np.float64)
+        complementary_feeding = _column_array(latest, 'mp_asi_memadai', 0, np.float64)
+        clean_water = _column_array(latest, 'air_bersih', 0, np.float64)
+        sanitation = _column_array(latest, 'jamban_sehat', 0, np.float64)
+        
+        # Trend extrapolation, and the heuristic where no trend could be fitted
+        slope = trends['slope'].to_numpy()
+        has_trend = ~np.isnan(slope)
+        enrolled = on_program != 0
+        predicted_haz = np.where(
+            has_trend,
+            haz + (slope * months_ahead),
+            np.where(enrolled & (age_months < 36), haz + (months_ahead * 0.05), haz - (months_ahead * 0.02))
+        )
+        
+        # Growth adjustments (array form of _haz_adjust)
+        age_factor = np.fmax(0.1, 1 - (age_months / 60))
+        program_effect = np.where(enrolled, 0.3 * np.fmin(1, program_months / 12) * age_factor * months_ahead / 6, 0)
+        water_sanitation_effect = 0.1 * (clean_water + sanitation) * months_ahead / 6
+        nutrition_effect = 0.15 * complementary_feeding * months_ahead / 6
+        hb_effect = 0.1 * np.fmax(0, (hemoglobin - 11) / 4) * months_ahead / 6
+        adjusted_haz = predicted_haz + program_effect + water_sanitation_effect + nutrition_effect + hb_effect
+        adjusted_haz = np.where(has_trend, np.fmax(-5, np.fmin(3, adjusted_haz)), predicted_haz)
+        
+        # Confidence (array form of _calculate_haz_confidence)
+        data_confidence = np.minimum(1, trends['n'].to_numpy() / 8)
+        trend_confidence = 1 / (1 + np.abs(trends['stderr'].to_numpy()))
+        r_squared_confidence = trends['rvalue'].to_numpy() ** 2
+        overall_confidence = (data_confidence * 0.4 + trend_confidence * 0.3 + r_squared_confidence * 0.3)
+        confidence = np.fmin(1, np.fmax(0.1, overall_confidence))
+        
+        # The heuristic only distinguishes high and low stunting risk
+        risk_code = np.select([adjusted_haz < -2, has_trend & (adjusted_haz < -1)], [2, 1], default=0)
+        masks = self._haz_recommendation_masks(adjusted_haz, age_months, exclusive_bf, complementary_feeding,
+                                               hemoglobin, clean_water, sanitation, on_program)
+        
+        results = pd.DataFrame({
+            'child_id': trends.index,
+            'haz_pred': np.round(adjusted_haz, 2),
+            'stunting_risk': STUNTING_RISK_LEVELS[risk_code],
+            'velocity_per_month': np.where(has_trend, np.round(slope, 3).astype(object), None),
+            'growth_pattern': np.where(has_trend, _classify_growth_pattern_vec(slope), None),
+            'catch_up_potential': _assess_catch_up_potential_vec(age_months, baseline_haz),
+            'confidence': np.where(has_trend, np.round(confidence, 3).astype(object), None),
+            'method': np.where(has_trend, 'trend', 'heuristic'),
+            'recommendations': [
+                list(self._haz_recommendations_for_mask(int(mask))) if trend else list(HAZ_HEURISTIC_RECOMMENDATIONS)
+                for mask, trend in zip(masks, has_trend)
+            ]
+        })
+        return results.to_dict(orient='records')
     
-    def calculate_risk_scores(self, population_data: pd.DataFrame, data_type: str = 'adults') -> Dict[str, Any]:
+    def calculate_risk_scores(self, population_data: pd.DataFrame, data_type: str = 'adults', use_gpu: bool = False) -> Dict[str, Any]:
         """
         Hitung skor risiko populasi dengan peningkatan ML
 
-        Menggunakan gabungan metode statistik dan aturan klinis
+        Menggunakan gabungan metode statistik dan aturan klinis. Dengan
+        use_gpu=True skor dewasa dihitung dengan CuPy bila tersedia (untuk
+        kohort sangat besar); tanpa CuPy tetap memakai NumPy.
         """
         try:
             if data_type == 'adults':
-                return self._calculate_adult_risk_scores(population_data)
+                return self._calculate_adult_risk_scores(population_data, _array_module(use_gpu))
             else:
                 return self._calculate_child_risk_scores(population_data)
                 
@@ -190,11 +602,211 @@ class HealthOutcomePredictor:
             print(f"Kesalahan menghitung skor risiko: {e}")
             return {'error': str(e)}
     
+    def _calculate_adult_risk_scores(self, population_data: pd.DataFrame, xp=np) -> Dict[str, Any]:
+        """Population BP risk from each adult's latest record, scored in one vectorized pass"""
+        
+        age_column = 'age' if 'age' in population_data.columns else 'usia'
+        assessment = _assess_bp_risk_vec(
+            _column_array(population_data, 'sistol', 140),
+            _column_array(population_data, 'diastol', 90),
+            _column_array(population_data, 'diabetes_koin', 0),
+            _column_array(population_data, 'perokok', 0),
+            _column_array(population_data, age_column, 50),
+            xp
+        )
+        
+        total = len(population_data)
+        distribution = _level_distribution(assessment['level_code'], BP_RISK_LEVELS)
+        high_risk_count = distribution['high'] + distribution['very_high']
+        
+        return {
+            'total_population': total,
+            'average_risk_score': round(float(assessment['risk_score'].mean(dtype=np.float64)), 3) if total else 0.0,
+            'risk_distribution': distribution,
+            'high_risk_count': high_risk_count,
+            'high_risk_percentage': _percentage(high_risk_count, total)
+        }
+    
+    def _calculate_child_risk_scores(self, population_data: pd.DataFrame) -> Dict[str, Any]:
+        """Population stunting risk from each child's latest record, scored in one vectorized pass"""
+        
+        haz = _column_array(population_data, 'HAZ', -1)
+        level_code = np.select([haz < -2, haz < -1], [2, 1], default=0)
+        
+        total = len(population_data)
+        distribution = _level_distribution(level_code, STUNTING_RISK_LEVELS)
+        
+        # A population without any HAZ reading averages to NaN; that is not worth a warning
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            average_haz = np.nanmean(haz, dtype=np.float64)
+        
+        return {
+            'total_population': total,
+            'average_haz': round(float(average_haz), 2) if total else 0.0,
+            'risk_distribution': distribution,
+            'high_risk_count': distribution['high'],
+            'high_risk_percentage': _percentage(distribution['high'], total),
+            'severe_stunting_percentage': _percentage(int(np.count_nonzero(haz < -3)), total)
+        }
+    
+    def fit_bp_trends(self, adults_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Tren tekanan darah per orang untuk seluruh kohort dalam satu proses
+
+        Mengembalikan satu baris per person_id dengan kolom n (jumlah catatan
+        dengan kedua bacaan) serta systolic_/diastolic_ slope, intercept,
+        rvalue dan stderr (slope per hari).
+        """
+        adults_data = _ensure_prepared(adults_data, 'person_id')
+        days = self._days_since_start(adults_data, 'person_id')
+        systolic = grouped_linregress(adults_data['person_id'], days, adults_data['sistol'])
+        diastolic = grouped_linregress(adults_data['person_id'], days, adults_data['diastol'])
+        both_readings = adults_data['sistol'].notna() & adults_data['diastol'].notna()
+        n = both_readings.groupby(adults_data['person_id'], sort=False).sum().rename('n')
+        return n.to_frame().join([systolic.drop(columns='n').add_prefix('systolic_'),
+                                  diastolic.drop(columns='n').add_prefix('diastolic_')])
+    
+    def fit_haz_trends(self, children_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Tren HAZ per anak untuk seluruh kohort dalam satu proses
+
+        Mengembalikan satu baris per child_id dengan kolom n, slope (per bulan),
+        intercept, rvalue dan stderr.
+        """
+        children_data = _ensure_prepared(children_data, 'child_id')
+        months = self._days_since_start(children_data, 'child_id') / 30
+        return grouped_linregress(children_data['child_id'], months, children_data['HAZ'])
+    
     # ===== HELPER METHODS =====
     
-    def _extract_bp_features(self, person_data: pd.DataFrame) -> Dict[str, Any]:
-        """Extract relevant features for BP prediction"""
-        latest = person_data.iloc[-1]
+    @staticmethod
+    def _validate_longitudinal_input(data: pd.DataFrame, id_column: str, value_columns: Tuple[str, ...],
+                                     trend_columns: Tuple[str, ...]) -> Optional[str]:
+        """Reason a prepared frame cannot be trend-fitted, or None when it can (missing readings are skipped)"""
+        if len(data) < 2:
+            return 'insufficient_data'
+        if '_days' not in data.columns or id_column not in data.columns or any(column not in data.columns for column in value_columns):
+            return 'missing_columns'
+        if not all(is_numeric_dtype(data[column]) for column in value_columns):
+            return 'non_numeric'
+        days = data['_days'].to_numpy()
+        for column in trend_columns:
+            measured_days = days[data[column].notna().to_numpy()]
+            if len(measured_days) < 2:
+                return 'insufficient_data'
+            if (measured_days == measured_days[0]).all():
+                return 'identical_dates'
+        return None
+    
+    def _validate_bp_input(self, person_data: pd.DataFrame) -> Optional[str]:
+        """Reason the BP trend model cannot be used for this person, or None when it can"""
+        return self._validate_longitudinal_input(person_data, 'person_id', ('sistol', 'diastol'), ('sistol', 'diastol'))
+    
+    def _validate_haz_input(self, child_data: pd.DataFrame) -> Optional[str]:
+        """Reason the HAZ trend model cannot be used for this child, or None when it can"""
+        return self._validate_longitudinal_input(child_data, 'child_id', ('HAZ', 'usia_bulan'), ('HAZ',))
+    
+    def _prepare_bp(self, person_data: pd.DataFrame) -> PreparedBP:
+        """Arrays, latest record, features and trends of one person's prepared BP records"""
+        
+        # Pull the columns and latest record out of pandas once
+        systolic = person_data['sistol'].to_numpy(dtype=np.float64)
+        diastolic = person_data['diastol'].to_numpy(dtype=np.float64)
+        latest = person_data.iloc[-1].to_dict()
+        
+        # Calculate trend (rows are already in date order), skipping missing readings like fit_bp_trends
+        days_since_start = self._elapsed_days(person_data)
+        systolic_measured, diastolic_measured = ~np.isnan(systolic), ~np.isnan(diastolic)
+        
+        return PreparedBP(
+            systolic, diastolic, latest,
+            self._extract_bp_features(systolic, diastolic, latest),
+            self._fast_linregress(days_since_start[systolic_measured], systolic[systolic_measured]),
+            self._fast_linregress(days_since_start[diastolic_measured], diastolic[diastolic_measured]),
+            int(np.count_nonzero(systolic_measured & diastolic_measured))
+        )
+    
+    def _prepare_haz(self, child_data: pd.DataFrame) -> PreparedHAZ:
+        """Array, latest record, features and trend of one child's prepared HAZ records"""
+        
+        # Pull the column and latest record out of pandas once
+        haz = child_data['HAZ'].to_numpy(dtype=np.float64)
+        latest = child_data.iloc[-1].to_dict()
+        
+        # Calculate growth velocity (rows are already in date order), skipping missing readings like fit_haz_trends
+        months_since_start = self._elapsed_days(child_data) / 30
+        measured = ~np.isnan(haz)
+        
+        return PreparedHAZ(haz, latest, self._extract_haz_features(haz, latest),
+                           self._fast_linregress(months_since_start[measured], haz[measured]),
+                           int(np.count_nonzero(measured)))
+    
+    def _get_prepared(self, kind: str, data: pd.DataFrame, id_column: str, value_columns: Tuple[str, ...], prepare):
+        """
+        Prepared records of one person, cached by id, record count, last record day and measurements
+
+        New records and edited measurements miss the cache. Edits to the other
+        columns of the latest record do not, so callers clear the cache with
+        clear_prepared_cache() whenever they reload the source data.
+        """
+        key = (kind, data[id_column].iat[-1], len(data), int(data['_days'].iat[-1]),
+               *(data[column].to_numpy(dtype=np.float64).tobytes() for column in value_columns))
+        prepared = self._prepared_cache.get(key)
+        if prepared is None:
+            prepared = prepare(data)
+            if len(self._prepared_cache) >= PREPARED_CACHE_SIZE:
+                # Dicts keep insertion order, so the first key is the oldest entry
+                del self._prepared_cache[next(iter(self._prepared_cache))]
+            self._prepared_cache[key] = prepared
+        return prepared
+    
+    def clear_prepared_cache(self):
+        """Forget every cached per-person preparation (call after reloading the source data)"""
+        self._prepared_cache.clear()
+    
+    @staticmethod
+    def _elapsed_days(data: pd.DataFrame) -> np.ndarray:
+        """Whole days since the first record of a single-person prepared frame, as floats"""
+        days = data['_days'].to_numpy()
+        return (days - days[0]).astype(np.float64)
+    
+    @staticmethod
+    def _days_since_start(data: pd.DataFrame, id_column: str) -> pd.Series:
+        """Whole days between each record and the first record of the same person (prepared frames only)"""
+        days = data['_days']
+        return days - days.groupby(data[id_column], sort=False).transform('first')
+    
+    @staticmethod
+    def _fast_linregress(x: np.ndarray, y: np.ndarray) -> TrendFit:
+        """
+        Closed-form scipy.stats.linregress (same slope/intercept/rvalue/stderr) without its input handling
+
+        Series of LSTSQ_MIN_POINTS or more finite readings take slope and
+        intercept from np.linalg.lstsq instead, whose SVD solve holds its
+        accuracy on long series; below that the centred sums are as accurate
+        and avoid building the design matrix.
+        """
+        n = x.size
+        mx, my = x.mean(), y.mean()
+        dx, dy = x - mx, y - my
+        sxx, sxy, syy = dx @ dx, dx @ dy, dy @ dy
+        if sxx == 0:
+            raise ValueError("Cannot calculate a linear regression if all x values are identical")
+        
+        if n >= LSTSQ_MIN_POINTS and np.isfinite(y).all():
+            design = np.stack([x, np.ones_like(x)], axis=1)
+            (slope, intercept), *_ = np.linalg.lstsq(design, y, rcond=None)
+        else:
+            slope = sxy / sxx
+            intercept = my - slope * mx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rvalue = np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0)
+            stderr = np.sqrt((1 - rvalue * rvalue) * syy / sxx / (n - 2)) if n > 2 else 0.0
+        return TrendFit(slope, intercept, rvalue, stderr)
+    
+    def _extract_bp_features(self, systolic: np.ndarray, diastolic: np.ndarray, latest: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract relevant features for BP prediction from the BP columns and the latest record"""
         
         features = {
             'age': latest.get('age', latest.get('usia', 50)),
@@ -205,17 +817,16 @@ class HealthOutcomePredictor:
             'diabetes': latest.get('diabetes_koin', 0),
             'smoking': latest.get('perokok', 0),
             'bmi': latest.get('BMI', 25),
-            'baseline_systolic': person_data['sistol'].iloc[0],
-            'baseline_diastolic': person_data['diastol'].iloc[0],
-            'bp_variability': person_data['sistol'].std(),
-            'data_points': len(person_data)
+            'baseline_systolic': systolic[0],
+            'baseline_diastolic': diastolic[0],
+            'bp_variability': _sample_nanstd(systolic),
+            'data_points': len(systolic)
         }
         
         return features
     
-    def _extract_haz_features(self, child_data: pd.DataFrame) -> Dict[str, Any]:
-        """Extract relevant features for HAZ prediction"""
-        latest = child_data.iloc[-1]
+    def _extract_haz_features(self, haz: np.ndarray, latest: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract relevant features for HAZ prediction from the HAZ column and the latest record"""
         
         features = {
             'age_months': latest.get('usia_bulan', 24),
@@ -227,9 +838,9 @@ class HealthOutcomePredictor:
             'complementary_feeding': latest.get('mp_asi_memadai', 0),
             'clean_water': latest.get('air_bersih', 0),
             'sanitation': latest.get('jamban_sehat', 0),
-            'baseline_haz': child_data['HAZ'].iloc[0],
-            'haz_variability': child_data['HAZ'].std(),
-            'data_points': len(child_data)
+            'baseline_haz': haz[0],
+            'haz_variability': _sample_nanstd(haz),
+            'data_points': len(haz)
         }
         
         return features
@@ -237,27 +848,10 @@ class HealthOutcomePredictor:
     def _apply_clinical_adjustments(self, systolic: float, diastolic: float, features: Dict, months: int) -> Dict[str, float]:
         """Apply clinical knowledge to adjust BP predictions"""
         
-        # Age effect (BP tends to increase with age)
-        age_adjustment = (features['age'] - 50) * 0.2 * months
-        
-        # Treatment effect
-        treatment_effect = 0
-        if features['on_treatment'] and features['adherence'] > 0:
-            # Treatment reduces BP over time
-            adherence_factor = features['adherence']
-            treatment_effect = -15 * adherence_factor * min(1, features['treatment_months'] / 6)
-        
-        # Lifestyle factors
-        diabetes_effect = 3 * features['diabetes'] * months
-        smoking_effect = 2 * features['smoking'] * months
-        
-        # Apply adjustments
-        adjusted_systolic = systolic + age_adjustment + treatment_effect + diabetes_effect + smoking_effect
-        adjusted_diastolic = diastolic + (age_adjustment * 0.6) + (treatment_effect * 0.7) + (diabetes_effect * 0.6)
-        
-        # Physiological bounds
-        adjusted_systolic = max(90, min(250, adjusted_systolic))
-        adjusted_diastolic = max(60, min(130, adjusted_diastolic))
+        adjusted_systolic, adjusted_diastolic = _bp_adjust(
+            systolic, diastolic, features['age'], features['on_treatment'], features['adherence'],
+            features['treatment_months'], features['diabetes'], features['smoking'], months
+        )
         
         return {
             'systolic': adjusted_systolic,
@@ -267,56 +861,40 @@ class HealthOutcomePredictor:
     def _apply_growth_adjustments(self, haz: float, features: Dict, months: int) -> Dict[str, float]:
         """Apply growth knowledge to adjust HAZ predictions"""
         
-        # Age-specific growth potential (younger children have more catch-up potential)
-        age_factor = max(0.1, 1 - (features['age_months'] / 60))  # Decreases with age
-        
-        # Program effect
-        program_effect = 0
-        if features['on_program']:
-            # Nutrition programs can improve HAZ, especially early intervention
-            program_intensity = min(1, features['program_months'] / 12)
-            program_effect = 0.3 * program_intensity * age_factor * months / 6
-        
-        # Environmental factors
-        water_sanitation_effect = 0.1 * (features['clean_water'] + features['sanitation']) * months / 6
-        nutrition_effect = 0.15 * features['complementary_feeding'] * months / 6
-        
-        # Anemia effect (low Hb associated with poor growth)
-        hb_effect = 0.1 * max(0, (features['hemoglobin'] - 11) / 4) * months / 6
-        
-        # Apply adjustments
-        adjusted_haz = haz + program_effect + water_sanitation_effect + nutrition_effect + hb_effect
-        
-        # Natural bounds for HAZ
-        adjusted_haz = max(-5, min(3, adjusted_haz))
-        
         return {
-            'haz': adjusted_haz
+            'haz': _haz_adjust(
+                haz, features['age_months'], features['on_program'], features['program_months'],
+                features['clean_water'], features['sanitation'], features['complementary_feeding'],
+                features['hemoglobin'], months
+            )
         }
     
-    def _calculate_bp_confidence(self, data: pd.DataFrame, sys_trend, dia_trend) -> float:
+    @staticmethod
+    def _calculate_bp_confidence(data_points: int, sys_stderr: float, dia_stderr: float,
+                                 sys_rvalue: float, dia_rvalue: float) -> float:
         """Calculate confidence in BP prediction based on data quality"""
         
         # More data points = higher confidence
-        data_confidence = min(1, len(data) / 10)
+        data_confidence = min(1, data_points / 10)
         
         # Lower trend variance = higher confidence
-        trend_confidence = 1 / (1 + abs(sys_trend.stderr) + abs(dia_trend.stderr))
+        trend_confidence = 1 / (1 + abs(sys_stderr) + abs(dia_stderr))
         
         # R-squared indicates how well trend fits
-        r_squared_confidence = (sys_trend.rvalue ** 2 + dia_trend.rvalue ** 2) / 2
+        r_squared_confidence = (sys_rvalue ** 2 + dia_rvalue ** 2) / 2
         
         # Combined confidence
         overall_confidence = (data_confidence * 0.3 + trend_confidence * 0.3 + r_squared_confidence * 0.4)
         
         return min(1, max(0.1, overall_confidence))
     
-    def _calculate_haz_confidence(self, data: pd.DataFrame, haz_trend) -> float:
+    @staticmethod
+    def _calculate_haz_confidence(data_points: int, haz_stderr: float, haz_rvalue: float) -> float:
         """Calculate confidence in HAZ prediction"""
         
-        data_confidence = min(1, len(data) / 8)
-        trend_confidence = 1 / (1 + abs(haz_trend.stderr))
-        r_squared_confidence = haz_trend.rvalue ** 2
+        data_confidence = min(1, data_points / 8)
+        trend_confidence = 1 / (1 + abs(haz_stderr))
+        r_squared_confidence = haz_rvalue ** 2
         
         overall_confidence = (data_confidence * 0.4 + trend_confidence * 0.3 + r_squared_confidence * 0.3)
         
@@ -416,7 +994,7 @@ class HealthOutcomePredictor:
                 'diastolic': [predicted_dia - 10, predicted_dia + 10]
             },
             'method': 'heuristic',
-            'recommendations': ['Disarankan pemantauan rutin', 'Pertimbangkan perubahan gaya hidup']
+            'recommendations': list(BP_HEURISTIC_RECOMMENDATIONS)
         }
     
     def _predict_haz_heuristic(self, latest_data: pd.Series, months_ahead: int) -> Dict[str, Any]:
@@ -448,24 +1026,15 @@ class HealthOutcomePredictor:
                 'stunting_risk': 'high' if predicted_haz < -2 else 'low'
             },
             'method': 'heuristic',
-            'recommendations': ['Pantau pertumbuhan secara rutin', 'Pastikan asupan gizi memadai']
+            'recommendations': list(HAZ_HEURISTIC_RECOMMENDATIONS)
         }
     
     def _get_bp_category(self, systolic: float, diastolic: float) -> str:
         """Get BP category based on WHO/JNC guidelines"""
-        
-        if systolic >= 180 or diastolic >= 110:
-            return 'Hipertensi Tahap 3 (Parah)'
-        elif systolic >= 160 or diastolic >= 100:
-            return 'Hipertensi Tahap 2'
-        elif systolic >= 140 or diastolic >= 90:
-            return 'Hipertensi Tahap 1'
-        elif systolic >= 130 or diastolic >= 85:
-            return 'Tinggi Normal'
-        elif systolic >= 120 or diastolic >= 80:
-            return 'Normal'
-        else:
-            return 'Optimal'
+        if not (math.isfinite(systolic) and math.isfinite(diastolic)):
+            return _bp_category.__wrapped__(systolic, diastolic)
+        # The thresholds are whole mmHg, so flooring the readings never changes the category
+        return _bp_category(math.floor(systolic), math.floor(diastolic))
     
     def _classify_growth_pattern(self, velocity: float) -> str:
         """Classify growth velocity pattern"""
@@ -482,61 +1051,128 @@ class HealthOutcomePredictor:
     def _generate_bp_recommendations(self, prediction: Dict, features: Dict) -> List[str]:
         """Generate personalized BP management recommendations"""
         
-        recommendations = []
+        systolic = prediction['systolic']
+        mask = (
+            (BP_REC_URGENT if systolic >= 160 else 0)
+            | (BP_REC_ELEVATED if systolic >= 140 else 0)
+            | (0 if features['on_treatment'] else BP_REC_UNTREATED)
+            | (BP_REC_SMOKING if features['smoking'] else 0)
+            | (BP_REC_DIABETES if features['diabetes'] else 0)
+            | (BP_REC_LOW_ADHERENCE if features['adherence'] < 0.8 else 0)
+        )
+        return list(self._bp_recommendations_for_mask(mask))
+    
+    def _generate_haz_recommendations(self, prediction: Dict, features: Dict) -> List[str]:
+        """Generate personalized nutrition recommendations"""
         
-        if prediction['systolic'] >= 160:
-            recommendations.append('Segera konsultasi medis diperlukan')
-            recommendations.append('Pertimbangkan rawat inap jika bergejala')
-        elif prediction['systolic'] >= 140:
-            recommendations.append('Tingkatkan pengobatan antihipertensi')
-            recommendations.append('Pantau tekanan darah setiap minggu')
+        haz = prediction['haz']
+        age_months = features['age_months']
+        mask = (
+            (HAZ_REC_SEVERE if haz < -3 else 0)
+            | (HAZ_REC_STUNTED if haz < -2 else 0)
+            | (HAZ_REC_FIRST_1000_DAYS if age_months < 24 else 0)
+            | (HAZ_REC_NO_EXCLUSIVE_BF if not features['exclusive_bf'] and age_months < 6 else 0)
+            | (HAZ_REC_POOR_FEEDING if not features['complementary_feeding'] and age_months >= 6 else 0)
+            | (HAZ_REC_ANEMIA if features['hemoglobin'] < 11 else 0)
+            | (HAZ_REC_POOR_WASH if not features['clean_water'] or not features['sanitation'] else 0)
+            | (0 if features['on_program'] else HAZ_REC_NO_PROGRAM)
+        )
+        return list(self._haz_recommendations_for_mask(mask))
+    
+    @staticmethod
+    def _bp_recommendation_masks(systolic: np.ndarray, on_treatment: np.ndarray, smoking: np.ndarray,
+                                 diabetes: np.ndarray, adherence: np.ndarray) -> np.ndarray:
+        """Condition bitmask per person deciding which BP recommendations apply (array form of the mask above)"""
+        return (
+            np.where(systolic >= 160, BP_REC_URGENT, 0)
+            | np.where(systolic >= 140, BP_REC_ELEVATED, 0)
+            | np.where(on_treatment.astype(bool), 0, BP_REC_UNTREATED)
+            | np.where(smoking.astype(bool), BP_REC_SMOKING, 0)
+            | np.where(diabetes.astype(bool), BP_REC_DIABETES, 0)
+            | np.where(adherence < 0.8, BP_REC_LOW_ADHERENCE, 0)
+        ).astype(np.uint16)
+    
+    @staticmethod
+    def _haz_recommendation_masks(haz: np.ndarray, age_months: np.ndarray, exclusive_bf: np.ndarray,
+                                  complementary_feeding: np.ndarray, hemoglobin: np.ndarray, clean_water: np.ndarray,
+                                  sanitation: np.ndarray, on_program: np.ndarray) -> np.ndarray:
+        """Condition bitmask per child deciding which nutrition recommendations apply (array form of the mask above)"""
+        return (
+            np.where(haz < -3, HAZ_REC_SEVERE, 0)
+            | np.where(haz < -2, HAZ_REC_STUNTED, 0)
+            | np.where(age_months < 24, HAZ_REC_FIRST_1000_DAYS, 0)
+            | np.where(~exclusive_bf.astype(bool) & (age_months < 6), HAZ_REC_NO_EXCLUSIVE_BF, 0)
+            | np.where(~complementary_feeding.astype(bool) & (age_months >= 6), HAZ_REC_POOR_FEEDING, 0)
+            | np.where(hemoglobin < 11, HAZ_REC_ANEMIA, 0)
+            | np.where(~clean_water.astype(bool) | ~sanitation.astype(bool), HAZ_REC_POOR_WASH, 0)
+            | np.where(on_program.astype(bool), 0, HAZ_REC_NO_PROGRAM)
+        ).astype(np.uint16)
+    
+    def _bp_recommendations_for_mask(self, mask: int) -> Tuple[str, ...]:
+        """Shared recommendation tuple for a BP condition mask, built on first use"""
+        if mask not in self._bp_recommendation_cache:
+            self._bp_recommendation_cache[mask] = self._build_bp_recommendations(mask)
+        return self._bp_recommendation_cache[mask]
+    
+    def _haz_recommendations_for_mask(self, mask: int) -> Tuple[str, ...]:
+        """Shared recommendation tuple for a HAZ condition mask, built on first use"""
+        if mask not in self._haz_recommendation_cache:
+            self._haz_recommendation_cache[mask] = self._build_haz_recommendations(mask)
+        return self._haz_recommendation_cache[mask]
+    
+    @staticmethod
+    def _build_bp_recommendations(mask: int) -> Tuple[str, ...]:
+        """BP management recommendations for one condition mask"""
+        
+        recommendations = ()
+        
+        if mask & BP_REC_URGENT:
+            recommendations += BP_URGENT_RECOMMENDATIONS
+        elif mask & BP_REC_ELEVATED:
+            recommendations += BP_ELEVATED_RECOMMENDATIONS
         
-        if not features['on_treatment'] and prediction['systolic'] >= 140:
-            recommendations.append('Mulai pengobatan antihipertensi')
+        if mask & BP_REC_UNTREATED and mask & BP_REC_ELEVATED:
+            recommendations += BP_START_TREATMENT_RECOMMENDATIONS
 
-        if features['smoking']:
-            recommendations.append('Konseling berhenti merokok - prioritas tinggi')
+        if mask & BP_REC_SMOKING:
+            recommendations += BP_SMOKING_RECOMMENDATIONS
 
-        if features['diabetes']:
-            recommendations.append('Optimalkan manajemen diabetes')
-            recommendations.append('Target tekanan darah <130/80 mmHg')
+        if mask & BP_REC_DIABETES:
+            recommendations += BP_DIABETES_RECOMMENDATIONS
 
-        if features['adherence'] < 0.8:
-            recommendations.append('Tingkatkan kepatuhan pengobatan melalui edukasi')
+        if mask & BP_REC_LOW_ADHERENCE:
+            recommendations += BP_ADHERENCE_RECOMMENDATIONS
 
-        recommendations.append('Aktivitas fisik teratur dan modifikasi pola makan')
-        
-        return recommendations
+        return recommendations + BP_LIFESTYLE_RECOMMENDATIONS
     
-    def _generate_haz_recommendations(self, prediction: Dict, features: Dict) -> List[str]:
-        """Generate personalized nutrition recommendations"""
+    @staticmethod
+    def _build_haz_recommendations(mask: int) -> Tuple[str, ...]:
+        """Nutrition recommendations for one condition mask"""
         
-        recommendations = []
+        recommendations = ()
         
-        if prediction['haz'] < -3:
-            recommendations.append('Intervensi gizi mendesak diperlukan')
-            recommendations.append('Pertimbangkan program pemberian makan terapeutik')
-        elif prediction['haz'] < -2:
-            recommendations.append('Diperlukan dukungan gizi intensif')
-            recommendations.append('Pantau pertumbuhan setiap bulan')
+        if mask & HAZ_REC_SEVERE:
+            recommendations += HAZ_SEVERE_RECOMMENDATIONS
+        elif mask & HAZ_REC_STUNTED:
+            recommendations += HAZ_STUNTED_RECOMMENDATIONS
         
-        if features['age_months'] < 24:
-            recommendations.append('Fokus pada 1000 hari pertama - periode kritis')
+        if mask & HAZ_REC_FIRST_1000_DAYS:
+            recommendations += HAZ_FIRST_1000_DAYS_RECOMMENDATIONS
 
-        if not features['exclusive_bf'] and features['age_months'] < 6:
-            recommendations.append('Promosikan pemberian ASI eksklusif')
+        if mask & HAZ_REC_NO_EXCLUSIVE_BF:
+            recommendations += HAZ_EXCLUSIVE_BF_RECOMMENDATIONS
 
-        if not features['complementary_feeding'] and features['age_months'] >= 6:
-            recommendations.append('Perbaiki praktik pemberian makanan pendamping ASI')
+        if mask & HAZ_REC_POOR_FEEDING:
+            recommendations += HAZ_FEEDING_RECOMMENDATIONS
 
-        if features['hemoglobin'] < 11:
-            recommendations.append('Atasi anemia dengan suplementasi zat besi')
+        if mask & HAZ_REC_ANEMIA:
+            recommendations += HAZ_ANEMIA_RECOMMENDATIONS
 
-        if not features['clean_water'] or not features['sanitation']:
-            recommendations.append('Perbaiki kondisi WASH untuk mencegah infeksi')
+        if mask & HAZ_REC_POOR_WASH:
+            recommendations += HAZ_WASH_RECOMMENDATIONS
 
-        if not features['on_program']:
-            recommendations.append('Daftarkan pada program dukungan gizi')
+        if mask & HAZ_REC_NO_PROGRAM:
+            recommendations += HAZ_PROGRAM_RECOMMENDATIONS
         
         return recommendations
 
@@ -548,7 +1184,7 @@ def predict_health_outcomes(person_data: pd.DataFrame, person_type: str = 'adult
     Main function to predict health outcomes
     
     Args:
-        person_data: DataFrame with individual's longitudinal health data
+        person_data: DataFrame with individual's longitudinal health data (ideally from prepare_longitudinal)
         person_type: 'adult' or 'child'
         months_ahead: Number of months to predict ahead
     
@@ -561,16 +1197,17 @@ def predict_health_outcomes(person_data: pd.DataFrame, person_type: str = 'adult
     else:
         return health_predictor.predict_haz_progression(person_data, months_ahead)
 
-def calculate_population_risk_scores(population_data: pd.DataFrame, data_type: str = 'adults') -> Dict[str, Any]:
+def calculate_population_risk_scores(population_data: pd.DataFrame, data_type: str = 'adults', use_gpu: bool = False) -> Dict[str, Any]:
     """
     Calculate risk scores for entire population
     
     Args:
         population_data: DataFrame with population health data
         data_type: 'adults' or 'children'
+        use_gpu: Score adults with CuPy when it is installed (falls back to NumPy)
     
     Returns:
         Dictionary with risk analysis for population
     """
     
-    return health_predictor.calculate_risk_scores(population_data, data_type)
+    return health_predictor.calculate_risk_scores(population_data, data_type, use_gpu)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pandas as pd
+
+from ml_predictions import health_predictor, prepare_longitudinal
+
+def _adults_with_missing_reading():
+    """Bundled adult records with one mid-series systolic reading of P001 removed"""
+    adults = prepare_longitudinal(pd.read_csv('adults_htn_longitudinal.csv'))
+    person_rows = adults.index[adults['person_id'] == 'P001']
+    adults.loc[person_rows[len(person_rows) // 2], 'sistol'] = np.nan
+    return adults
+
+def test_bp_batch_matches_single_person_with_missing_reading():
+    adults = _adults_with_missing_reading()
+    person_data = adults[adults['person_id'] == 'P001']
+
+    single = health_predictor.predict_bp_progression(person_data, 6)
+    batch = {r['person_id']: r for r in health_predictor.predict_bp_progression_many(adults, 6)}['P001']
+
+    assert single['predicted_bp']['systolic'] == batch['sys_pred']
+    assert single['predicted_bp']['diastolic'] == batch['dia_pred']
+    assert single['trend_analysis']['trend_confidence'] == batch['confidence']
+    assert single['predicted_bp']['systolic'] < 250  # not the NaN-clamped upper bound
+
+def test_bp_trend_count_skips_missing_reading():
+    adults = _adults_with_missing_reading()
+    trends = health_predictor.fit_bp_trends(adults)
+
+    assert trends.loc['P001', 'n'] == (adults['person_id'] == 'P001').sum() - 1
+
+def test_haz_batch_matches_single_child_with_missing_reading():
+    children = prepare_longitudinal(pd.read_csv('children_stunting_longitudinal.csv'), 'child_id')
+    child_rows = children.index[children['child_id'] == 'C001']
+    children.loc[child_rows[len(child_rows) // 2], 'HAZ'] = np.nan
+    child_data = children[children['child_id'] == 'C001']
+
+    single = health_predictor.predict_haz_progression(child_data, 6)
+    batch = {r['child_id']: r for r in health_predictor.predict_haz_progression_many(children, 6)}['C001']
+
+    assert single['predicted_status']['haz'] == batch['haz_pred']
+    assert single['confidence_interval']['confidence_score'] == batch['confidence']
+
+def test_raw_frame_is_prepared_on_the_fly():
+    adults = pd.read_csv('adults_htn_longitudinal.csv')
+    person_data = adults[adults['person_id'] == 'P001']
+
+    raw = health_predictor.predict_bp_progression(person_data, 6)
+    prepared = health_predictor.predict_bp_progression(prepare_longitudinal(person_data), 6)
+
+    assert raw == prepared
+    assert len(health_predictor.predict_bp_progression_many(adults, 6)) == adults['person_id'].nunique()
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
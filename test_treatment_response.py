@@ -2,6 +2,9 @@
 
 import requests
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # Test different parameters to see if the treatment response changes
 base_url = "http://localhost:8091/predictions/treatment-response/P001"
@@ -13,12 +16,35 @@ test_cases = [
     {"intervention_type": "lifestyle", "duration_months": 12, "adherence": 0.9},
 ]
 
+POOL_SIZE = 8
+
+# requests.Session is not guaranteed thread-safe, so each worker keeps its own keep-alive session
+worker_state = threading.local()
+
+def get_session():
+    """This worker thread's session, created on first use"""
+    if not hasattr(worker_state, "session"):
+        worker_state.session = requests.Session()
+        worker_state.session.mount("http://", HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+    return worker_state.session
+
+def fetch(params):
+    """GET one test case, returning the response or the exception raised"""
+    try:
+        return get_session().get(base_url, params=params)
+    except Exception as e:
+        return e
+
 print("🧪 Testing Treatment Response Variations")
 print("=" * 50)
 
-for i, params in enumerate(test_cases, 1):
+with ThreadPoolExecutor(max_workers=min(POOL_SIZE, len(test_cases))) as executor:
+    responses = list(executor.map(fetch, test_cases))
+
+for i, (params, response) in enumerate(zip(test_cases, responses), 1):
     try:
-        response = requests.get(base_url, params=params)
+        if isinstance(response, Exception):
+            raise response
         if response.status_code == 200:
             data = response.json()
             treatment = data.get('treatment_response', {})